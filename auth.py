@@ -4,22 +4,110 @@ from typing import Optional, Annotated
 import httpx
 from datetime import datetime, timezone, timedelta
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from models import User, SessionData
+from cache import get_cache
+from metrics import get_recorder
+from timing import timed
+from versioning import bump_version
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SESSION_URL = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+
+# User fields a login may change that cached sessions expose
+PROFILE_FIELDS = ("name", "picture")
+
+# Latency of the upstream session-data call
+upstream_latency = get_recorder("emergent_session_data")
+
+# Shared pooled client, opened and closed by the app lifespan
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client with explicit timeouts for the Emergent API"""
+    http2 = os.environ.get('EMERGENT_HTTP2', 'false').lower() == 'true'
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("EMERGENT_HTTP2 requested but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+    
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            float(os.environ.get('EMERGENT_READ_TIMEOUT', '10')),
+            connect=float(os.environ.get('EMERGENT_CONNECT_TIMEOUT', '3')),
+            pool=float(os.environ.get('EMERGENT_POOL_TIMEOUT', '5'))
+        ),
+        limits=httpx.Limits(
+            max_connections=int(os.environ.get('EMERGENT_MAX_CONNECTIONS', '100')),
+            max_keepalive_connections=int(os.environ.get('EMERGENT_MAX_KEEPALIVE', '20')),
+            keepalive_expiry=float(os.environ.get('EMERGENT_KEEPALIVE_EXPIRY', '30'))
+        )
+    )
+
+
+async def start_http_client():
+    """Open the shared upstream client (app startup)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+
+
+async def close_http_client():
+    """Close the shared upstream client (app shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared upstream client, created lazily outside the app lifespan"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
+
+def _session_ttu(token: str, user: User, now: float) -> float:
+    """Expire a cached session no later than its session_expires"""
+    expires = user.session_expires
+    if expires is None:
+        return now
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return now + (expires - datetime.now(timezone.utc)).total_seconds()
+
+
+# token -> User cache shared by every EmergentAuth instance. Entries live at
+# most SESSION_CACHE_TTL_SECONDS so manual changes (e.g. is_admin) show up;
+# SESSION_CACHE_MAX_ENTRIES / _TTL_SECONDS are read on first use.
+session_cache = get_cache(
+    "sessions",
+    maxsize=10000,
+    ttl=60,
+    ttu=_session_ttu,
+    env_prefix="SESSION_CACHE"
+)
+
 class EmergentAuth:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
-        self.session_url = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+        self.session_url = os.environ.get('EMERGENT_SESSION_URL', DEFAULT_SESSION_URL)
         
     async def get_session_data(self, session_id: str) -> Optional[SessionData]:
         """Get user session data from Emergent Auth"""
         try:
             headers = {"X-Session-ID": session_id}
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.session_url, headers=headers)
+            with upstream_latency.time(), timed("upstream"):
+                response = await get_http_client().get(self.session_url, headers=headers)
                 
             if response.status_code == 200:
                 data = response.json()
@@ -33,44 +121,57 @@ class EmergentAuth:
             return None
     
     async def create_or_update_user(self, session_data: SessionData) -> User:
-        """Create or update user in database"""
+        """Create or update user in database (single atomic upsert keyed on email)"""
         try:
-            # Check if user exists
-            existing_user = await self.db.users.find_one({"email": session_data.email})
-            
-            if existing_user:
-                # Update existing user
-                update_data = {
+            now = datetime.now(timezone.utc)
+            update = {
+                "$set": {
                     "session_token": session_data.session_token,
-                    "session_expires": datetime.now(timezone.utc) + timedelta(days=7),
-                    "lastLogin": datetime.now(timezone.utc),
+                    "session_expires": now + timedelta(days=7),
+                    "lastLogin": now,
                     "name": session_data.name,
                     "picture": session_data.picture
+                },
+                "$setOnInsert": {
+                    "id": session_data.id,
+                    "is_admin": False,  # You can manually set admin users in the database
+                    "createdAt": now
                 }
-                
-                await self.db.users.update_one(
+            }
+            
+            try:
+                previous = await self.db.users.find_one_and_update(
                     {"email": session_data.email},
-                    {"$set": update_data}
+                    update,
+                    upsert=True,
+                    return_document=ReturnDocument.BEFORE
                 )
-                
-                # Get updated user
-                updated_user = await self.db.users.find_one({"email": session_data.email})
-                return User(**updated_user)
-            else:
-                # Create new user
-                new_user = User(
-                    id=session_data.id,
-                    email=session_data.email,
-                    name=session_data.name,
-                    picture=session_data.picture,
-                    session_token=session_data.session_token,
-                    session_expires=datetime.now(timezone.utc) + timedelta(days=7),
-                    is_admin=False,  # You can manually set admin users in the database
-                    lastLogin=datetime.now(timezone.utc)
+            except DuplicateKeyError:
+                # A concurrent login inserted the user first; the retry
+                # matches that document and updates it instead
+                previous = await self.db.users.find_one_and_update(
+                    {"email": session_data.email},
+                    update,
+                    upsert=True,
+                    return_document=ReturnDocument.BEFORE
                 )
-                
-                await self.db.users.insert_one(new_user.dict())
-                return new_user
+            
+            # The pre-image plus the update is what is now stored
+            inserted = {"email": session_data.email, **update["$setOnInsert"]}
+            user_data = {**(previous or inserted), **update["$set"]}
+            
+            if previous is not None:
+                old_token = previous.get("session_token")
+                if old_token and old_token != session_data.session_token:
+                    # Replaced by the new token; other workers drop it within
+                    # SESSION_CACHE_TTL_SECONDS
+                    session_cache.pop(old_token)
+                if any(previous.get(field) != user_data[field] for field in PROFILE_FIELDS):
+                    # Sessions cached anywhere carry the old profile
+                    session_cache.discard(lambda token, user: user.email == session_data.email)
+                    await bump_version(self.db, "users")
+            
+            return User(**user_data)
                 
         except Exception as e:
             logger.error(f"Error creating/updating user: {str(e)}")
@@ -82,6 +183,13 @@ class EmergentAuth:
                              authorization: Optional[str] = None) -> Optional[User]:
         """Get current authenticated user from session token"""
         try:
+            # Route handlers call this directly with only the request, so
+            # both arrive as None; read them from the request instead
+            if not isinstance(session_token, str):
+                session_token = request.cookies.get("session_token")
+            if not isinstance(authorization, str):
+                authorization = request.headers.get("Authorization")
+            
             # Try cookie first, then Authorization header
             token = session_token
             if not token and authorization:
@@ -93,16 +201,24 @@ class EmergentAuth:
             if not token:
                 return None
             
-            # Find user by session token
-            user_data = await self.db.users.find_one({
-                "session_token": token,
-                "session_expires": {"$gt": datetime.now(timezone.utc)}
-            })
-            
-            if user_data:
-                return User(**user_data)
-            else:
-                return None
+            with timed("auth"):
+                cached_user = session_cache.get(token, None)
+                if cached_user is not None:
+                    return cached_user
+                
+                # Find user by session token
+                generation = session_cache.generation
+                user_data = await self.db.users.find_one({
+                    "session_token": token,
+                    "session_expires": {"$gt": datetime.now(timezone.utc)}
+                })
+                
+                if user_data:
+                    user = User(**user_data)
+                    session_cache.set(token, user, generation)
+                    return user
+                else:
+                    return None
                 
         except Exception as e:
             logger.error(f"Error getting current user: {str(e)}")
@@ -135,6 +251,8 @@ class EmergentAuth:
                 {"id": user_id},
                 {"$unset": {"session_token": "", "session_expires": ""}}
             )
+            session_cache.discard(lambda token, user: user.id == user_id)
+            await bump_version(self.db, "users")
         except Exception as e:
             logger.error(f"Error logging out user: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to logout")
\ No newline at end of file
@@ -3,18 +3,18 @@ from fastapi.responses import JSONResponse
 from typing import Optional, Annotated
 from auth import EmergentAuth
 from models import User, SessionData
-from database import database
+from dependencies import get_auth
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# Initialize auth instance
-auth = EmergentAuth(database.db)
-
 @router.post("/session")
-async def process_session(request: Request):
+async def process_session(
+    request: Request,
+    auth: EmergentAuth = Depends(get_auth)
+):
     """Process session ID from Emergent Auth and create session"""
     try:
         body = await request.json()
@@ -65,7 +65,10 @@ async def process_session(request: Request):
         raise HTTPException(status_code=500, detail="Failed to process session")
 
 @router.get("/me")
-async def get_current_user_info(request: Request):
+async def get_current_user_info(
+    request: Request,
+    auth: EmergentAuth = Depends(get_auth)
+):
     """Get current authenticated user information"""
     try:
         user = await auth.get_current_user(request)
@@ -91,7 +94,10 @@ async def get_current_user_info(request: Request):
         raise HTTPException(status_code=500, detail="Failed to get user info")
 
 @router.post("/logout")
-async def logout(request: Request):
+async def logout(
+    request: Request,
+    auth: EmergentAuth = Depends(get_auth)
+):
     """Logout current user"""
     try:
         user = await auth.get_current_user(request)
@@ -115,7 +121,10 @@ async def logout(request: Request):
         raise HTTPException(status_code=500, detail="Failed to logout")
 
 @router.get("/check")
-async def check_auth_status(request: Request):
+async def check_auth_status(
+    request: Request,
+    auth: EmergentAuth = Depends(get_auth)
+):
     """Check if user is authenticated"""
     try:
         user = await auth.get_current_user(request)
@@ -11,8 +11,14 @@ import os
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-# Get backend URL from environment
-BACKEND_URL = "https://signalpro-1.preview.emergentagent.com/api"
+# Get backend URL from environment (defaults to a local server; for load and
+# latency numbers see bench_api.py)
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://127.0.0.1:8001/api")
+
+# Set when the backend exchanges sessions against emergent_stub.py
+# (EMERGENT_SESSION_URL), which accepts any session id
+STUB_AUTH = os.environ.get("STUB_AUTH", "false").lower() == "true"
+CONCURRENT_LOGINS = int(os.environ.get("CONCURRENT_LOGINS", "300"))
 
 class TradingHubAPITester:
     def __init__(self):
@@ -383,6 +389,40 @@ class TradingHubAPITester:
             except Exception as e:
                 self.log_test(f"{method} {endpoint} (no auth)", False, f"Exception: {str(e)}")
     
+    async def test_concurrent_session_logins(self):
+        """Fire simultaneous /auth/session calls for the same user (needs STUB_AUTH)"""
+        print("=== TESTING CONCURRENT SESSION LOGINS ===")
+        
+        if not STUB_AUTH:
+            print("Skipped: set STUB_AUTH=true with the backend pointed at emergent_stub.py\n")
+            return
+        
+        session_id = f"concurrency-{datetime.now().timestamp()}"
+        
+        try:
+            responses = await asyncio.gather(*[
+                self.client.post(f"{self.base_url}/auth/session", json={"session_id": session_id})
+                for _ in range(CONCURRENT_LOGINS)
+            ], return_exceptions=True)
+            
+            failures = [r for r in responses if isinstance(r, Exception) or r.status_code != 200]
+            user_ids = {r.json()["user"]["id"] for r in responses if not isinstance(r, Exception) and r.status_code == 200}
+            
+            if not failures and len(user_ids) == 1:
+                self.log_test(f"POST /api/auth/session x{CONCURRENT_LOGINS} (same user)", True, f"All logins succeeded for user {user_ids.pop()}")
+            else:
+                self.log_test(f"POST /api/auth/session x{CONCURRENT_LOGINS} (same user)", False, f"{len(failures)} failed, {len(user_ids)} distinct user ids")
+                return
+            
+            token = responses[0].cookies.get("session_token")
+            response = await self.client.get(f"{self.base_url}/auth/me", headers={"Authorization": f"Bearer {token}"})
+            if response.status_code == 200:
+                self.log_test("GET /api/auth/me after concurrent logins", True, f"Session valid for {response.json()['user']['email']}")
+            else:
+                self.log_test("GET /api/auth/me after concurrent logins", False, f"Status: {response.status_code}")
+        except Exception as e:
+            self.log_test(f"POST /api/auth/session x{CONCURRENT_LOGINS} (same user)", False, f"Exception: {str(e)}")
+    
     async def test_database_seeding(self):
         """Test that database seeding worked correctly"""
         print("=== TESTING DATABASE SEEDING ===")
@@ -453,6 +493,7 @@ async def main():
         await tester.test_brokers_api()
         await tester.test_testimonials_api()
         await tester.test_auth_endpoints()
+        await tester.test_concurrent_session_logins()
         
         # Print summary
         passed, failed, total = tester.print_summary()
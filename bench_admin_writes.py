@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+TradingHub admin write benchmark
+Compares the old read-before-write handler patterns (find_one, write,
+find_one) against the single-operation versions now used by the update,
+delete and approve handlers.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python bench_admin_writes.py --ops 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import random
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from bench_list_queries import make_provider, percentiles
+from indexes import ensure_indexes
+
+
+async def update_before(collection, doc_id: str):
+    if not await collection.find_one({"id": doc_id}):
+        return None
+    await collection.update_one({"id": doc_id}, {"$set": {"rating": 4.5, "updatedAt": datetime.now(timezone.utc)}})
+    return await collection.find_one({"id": doc_id})
+
+
+async def update_after(collection, doc_id: str):
+    return await collection.find_one_and_update(
+        {"id": doc_id},
+        {"$set": {"rating": 4.5, "updatedAt": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def delete_before(collection, doc_id: str):
+    if not await collection.find_one({"id": doc_id}):
+        return False
+    await collection.delete_one({"id": doc_id})
+    return True
+
+
+async def delete_after(collection, doc_id: str):
+    result = await collection.delete_one({"id": doc_id})
+    return result.deleted_count == 1
+
+
+async def run(fn, collection, ids, concurrency: int) -> dict:
+    """Run ``fn`` once per id with bounded concurrency; report throughput and latency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(doc_id):
+        async with semaphore:
+            start = time.perf_counter()
+            await fn(collection, doc_id)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(doc_id) for doc_id in ids])
+    elapsed = time.perf_counter() - start
+    return {"ops_per_sec": round(len(ids) / elapsed, 1), **percentiles(samples)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--db", default="tradinghub_bench_writes")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[args.db]
+    collection = db.providers
+
+    try:
+        await ensure_indexes(db)
+        rng = random.Random(7)
+        base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        ids = [f"bench-{i}" for i in range(args.ops)]
+
+        async def reset():
+            await collection.delete_many({})
+            await collection.insert_many([make_provider(i, rng, base_time) for i in range(args.ops)])
+
+        results = {}
+        for name, fn in [("update_before", update_before), ("update_after", update_after),
+                         ("delete_before", delete_before), ("delete_after", delete_after)]:
+            await reset()
+            results[name] = await run(fn, collection, ids, args.concurrency)
+
+        print(json.dumps({"ops": args.ops, "concurrency": args.concurrency, "results": results}, indent=2))
+    finally:
+        await db.drop_collection("providers")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
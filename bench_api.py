@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+TradingHub API load benchmark
+Drives a weighted mix of workloads (filtered listing, regex search, text
+search, detail, auth check, admin writes) with closed-loop concurrent
+clients and reports throughput and p50/p95/p99 latency per workload as JSON.
+
+Targets:
+    --target inprocess   boot server:app in this process and call it through
+                         httpx's ASGI transport (no network). Mongo is
+                         --mongo memory (mongomock-motor; no $text, so the
+                         text workload is left out of the default mix) or
+                         --mongo local (MONGO_URL, e.g. a local mongod)
+    --target URL         an already running server, e.g. http://127.0.0.1:8001,
+                         whose database (MONGO_URL, --db) the benchmark
+                         fills with providers and session users first
+
+--baseline FILE fails the run (exit code 1) when a workload's p95 grows, or
+its throughput drops, by more than --tolerance against FILE, or its error
+count rises; with --save-baseline the run is written to FILE instead.
+Baselines only compare runs made on the same machine and settings.
+
+Usage:
+    python bench_api.py --mongo memory --duration 10 --concurrency 16
+    MONGO_URL=mongodb://localhost:27017 python bench_api.py --mongo local --providers 100000 \\
+        --baseline bench_api_baseline.json --save-baseline
+    MONGO_URL=mongodb://localhost:27017 python bench_api.py --baseline bench_api_baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, UpdateOne
+
+from bench_list_queries import SIGNAL_TYPES, RISK_LEVELS, percentiles
+from datagen import write_collection
+
+DEFAULT_MIX = "list=35,search=15,text=10,detail=25,auth=10,admin=5"
+
+SEARCH_TERMS = ["Alpha", "Signals", "Forex", "Crypto", "Quantum Pips", "Pro", "DeFi"]
+BROKER_INSTRUMENTS = ["Forex", "Crypto", "CFDs", "Stocks"]
+
+# (method, path, json body, headers) of one request
+Request = Tuple[str, str, Optional[Dict[str, Any]], Dict[str, str]]
+
+
+def _bust(path: str, rng: random.Random, ctx) -> str:
+    """Distinct query strings defeat the response cache"""
+    if not ctx.cache_bust:
+        return path
+    return path + ("&" if "?" in path else "?") + f"skip={rng.randrange(50)}"
+
+
+def list_request(rng: random.Random, ctx) -> Request:
+    path = rng.choice([
+        f"/api/providers/?signalType={rng.choice(SIGNAL_TYPES)}&limit=20",
+        f"/api/providers/?riskLevel={rng.choice(RISK_LEVELS)}&limit=20",
+        f"/api/providers/?priceRange={rng.choice(['0-100', '100-150', '150-9999'])}&sort=-rating&limit=20",
+        f"/api/brokers/?instrumentType={rng.choice(BROKER_INSTRUMENTS)}&limit=20",
+        "/api/testimonials/",
+    ])
+    return "GET", _bust(path, rng, ctx), None, {}
+
+
+def search_request(rng: random.Random, ctx) -> Request:
+    collection = rng.choice(["providers", "brokers"])
+    return "GET", _bust(f"/api/{collection}/?search={rng.choice(SEARCH_TERMS)}&limit=20", rng, ctx), None, {}
+
+
+def text_request(rng: random.Random, ctx) -> Request:
+    return "GET", _bust(f"/api/providers/search?q={rng.choice(SEARCH_TERMS)}", rng, ctx), None, {}
+
+
+def detail_request(rng: random.Random, ctx) -> Request:
+    return "GET", f"/api/providers/gen-{rng.randrange(ctx.providers)}", None, {}
+
+
+def auth_request(rng: random.Random, ctx) -> Request:
+    return "GET", "/api/auth/me", None, {"Authorization": f"Bearer {rng.choice(ctx.tokens)}"}
+
+
+def admin_request(rng: random.Random, ctx) -> Request:
+    return (
+        "PUT",
+        f"/api/providers/gen-{rng.randrange(ctx.providers)}",
+        {"rating": round(rng.uniform(3.0, 5.0), 1)},
+        {"Authorization": f"Bearer {ctx.admin_token}"},
+    )
+
+
+WORKLOADS: Dict[str, Callable[[random.Random, Any], Request]] = {
+    "list": list_request,
+    "search": search_request,
+    "text": text_request,
+    "detail": detail_request,
+    "auth": auth_request,
+    "admin": admin_request,
+}
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in WORKLOADS:
+            raise SystemExit(f"Unknown workload {name!r} (choose from {', '.join(WORKLOADS)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+async def prepare(db, args) -> SimpleNamespace:
+    """Synthetic providers (datagen.py) plus session users (one of them admin)"""
+    await write_collection(db, "providers", args.providers, args.seed)
+
+    expires = datetime.now(timezone.utc) + timedelta(days=1)
+    users = [
+        {"id": f"bench-user-{i}", "email": f"bench-{i}@bench.local", "name": f"Bench User {i}",
+         "session_token": f"bench-token-{i}", "session_expires": expires, "is_admin": False}
+        for i in range(args.users)
+    ]
+    users.append({"id": "bench-admin", "email": "bench-admin@bench.local", "name": "Bench Admin",
+                  "session_token": "bench-admin-token", "session_expires": expires, "is_admin": True})
+    await db.users.bulk_write([UpdateOne({"id": user["id"]}, {"$set": user}, upsert=True) for user in users])
+
+    return SimpleNamespace(
+        providers=args.providers,
+        tokens=[user["session_token"] for user in users[:-1]],
+        admin_token="bench-admin-token",
+        cache_bust=args.cache_bust,
+    )
+
+
+async def drive(client: httpx.AsyncClient, ctx, mix: Dict[str, int], concurrency: int,
+                duration: float, seed_value: int) -> Tuple[Dict[str, List[float]], Dict[str, int]]:
+    """Closed loop: ``concurrency`` clients each issue one request at a time"""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def loop(slot: int):
+        rng = random.Random(seed_value * 1000 + slot)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body, headers = WORKLOADS[name](rng, ctx)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                if response.status_code != 200:
+                    errors[name] += 1
+            except httpx.HTTPError:
+                errors[name] += 1
+            except Exception:
+                # ASGITransport re-raises what the app raised in process
+                errors[name] += 1
+            samples[name].append(time.perf_counter() - start)
+
+    await asyncio.gather(*(loop(slot) for slot in range(concurrency)))
+    return samples, errors
+
+
+def summarize(samples: Dict[str, List[float]], errors: Dict[str, int], duration: float) -> Dict[str, Any]:
+    workloads = {
+        name: {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "rps": round(len(values) / duration, 1),
+            **percentiles(values),
+        }
+        for name, values in sorted(samples.items())
+    }
+    everything = [value for values in samples.values() for value in values]
+    overall = {
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "rps": round(len(everything) / duration, 1),
+        **(percentiles(everything) if everything else {}),
+    }
+    return {"workloads": workloads, "overall": overall}
+
+
+async def measure(client: httpx.AsyncClient, ctx, args) -> Dict[str, Any]:
+    if args.warmup:
+        await drive(client, ctx, args.mix, args.concurrency, args.warmup, args.seed + 1)
+    samples, errors = await drive(client, ctx, args.mix, args.concurrency, args.duration, args.seed)
+    return summarize(samples, errors, args.duration)
+
+
+async def run_inprocess(args) -> Dict[str, Any]:
+    # One process: there are no other workers' writes to invalidate from
+    os.environ.setdefault("CACHE_INVALIDATION", "off")
+    if args.mongo == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--mongo memory needs mongomock-motor (pip install mongomock-motor)")
+        import database
+        database.AsyncIOMotorClient = AsyncMongoMockClient
+    else:
+        os.environ["DB_NAME"] = args.db
+        if args.reset:
+            MongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017")).drop_database(args.db)
+
+    import server
+    app = server.app
+    # server.py logs at INFO, where httpx logs every request it sends
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async with app.router.lifespan_context(app):
+        deadline = time.perf_counter() + args.timeout
+        while not app.state.ready:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("App did not finish warming up")
+            await asyncio.sleep(0.05)
+
+        ctx = await prepare(app.state.db, args)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            return await measure(client, ctx, args)
+
+
+async def run_remote(args) -> Dict[str, Any]:
+    mongo = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    try:
+        ctx = await prepare(mongo[args.db], args)
+    finally:
+        mongo.close()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + args.timeout
+        while True:
+            try:
+                if (await client.get("/api/health")).json().get("ready"):
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError("Server did not become ready")
+            await asyncio.sleep(0.5)
+        return await measure(client, ctx, args)
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``report`` against ``baseline``, one line each"""
+    regressions = []
+    for name, current in report["workloads"].items():
+        base = baseline.get("workloads", {}).get(name)
+        if not base:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['rps']} -> {current['rps']} req/s")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="inprocess", help="inprocess, or the base URL of a running server")
+    parser.add_argument("--mongo", choices=["memory", "local"], default="memory",
+                        help="Database behind the in-process app")
+    parser.add_argument("--db", default="tradinghub_bench_api", help="Database name for --mongo local and URL targets")
+    parser.add_argument("--reset", action="store_true", help="Drop the --mongo local database before starting")
+    parser.add_argument("--mix", default=None, help=f"Workload weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds of unmeasured load first")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent closed-loop clients")
+    parser.add_argument("--providers", type=int, default=1000, help="Benchmark providers to insert")
+    parser.add_argument("--users", type=int, default=100, help="Session users for the auth workload")
+    parser.add_argument("--cache-bust", action="store_true", help="Vary query strings so reads reach Mongo")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated catalog and the request sequence")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for the app to become ready")
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative p95/throughput regression")
+    args = parser.parse_args()
+
+    inprocess = args.target == "inprocess"
+    mix_spec = args.mix or DEFAULT_MIX
+    if args.mix is None and inprocess and args.mongo == "memory":
+        # mongomock has no $text
+        mix_spec = ",".join(part for part in DEFAULT_MIX.split(",") if not part.startswith("text="))
+    args.mix = parse_mix(mix_spec)
+
+    results = asyncio.run(run_inprocess(args) if inprocess else run_remote(args))
+    report = {
+        "target": args.target,
+        "mongo": args.mongo if inprocess else "server",
+        "providers": args.providers,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "cache_bust": args.cache_bust,
+        "mix": args.mix,
+        "cpus": os.cpu_count(),
+        **results,
+    }
+
+    regressions = []
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if regressions:
+        print("Regressions against baseline:\n  " + "\n  ".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
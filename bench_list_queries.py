@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+TradingHub list query benchmark
+Compares the old sequential count + find listing against fetch_page
+(concurrent page + total, optional estimated/none totals) on a large
+providers collection.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python bench_list_queries.py --docs 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timezone, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import ensure_indexes
+from pagination import fetch_page, sort_spec
+
+SIGNAL_TYPES = ["Forex", "Crypto", "CFDs", "Commodities", "Indices", "Stocks", "DeFi"]
+RISK_LEVELS = ["Baixo", "Médio", "Alto"]
+
+# Query shapes exercised by the frontend filters
+QUERIES = {
+    "unfiltered": {},
+    "signalType": {"signalTypes": "Crypto"},
+    "priceRange": {"subscriptionPrice": {"$gte": 50, "$lte": 100}},
+    "signalType+price": {"signalTypes": "Forex", "subscriptionPrice": {"$gte": 150}},
+}
+
+
+def make_provider(i: int, rng: random.Random, base_time: datetime) -> dict:
+    return {
+        "id": f"bench-{i}",
+        "name": f"Provider {i}",
+        "winRate": rng.randint(50, 95),
+        "tradesLastMonth": rng.randint(10, 500),
+        "signalTypes": rng.sample(SIGNAL_TYPES, rng.randint(1, 3)),
+        "subscriptionPrice": rng.randint(10, 300),
+        "currency": "USD",
+        "rating": round(rng.uniform(3.0, 5.0), 1),
+        "followers": rng.randint(0, 10000),
+        "description": "Benchmark provider",
+        "riskLevel": rng.choice(RISK_LEVELS),
+        "avgPipsProfitMonthly": rng.randint(0, 1000),
+        "verified": True,
+        "affiliateUrl": f"https://example.com/{i}",
+        "createdAt": base_time + timedelta(seconds=i),
+        "updatedAt": base_time + timedelta(seconds=i),
+    }
+
+
+async def seed(collection, docs: int, chunk: int = 10000):
+    """Fill the benchmark collection up to ``docs`` documents"""
+    if await collection.estimated_document_count() == docs:
+        return
+    await collection.delete_many({})
+    rng = random.Random(42)
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for start in range(0, docs, chunk):
+        batch = [make_provider(i, rng, base_time) for i in range(start, min(start + chunk, docs))]
+        await collection.insert_many(batch, ordered=False)
+
+
+async def list_before(collection, filter_query: dict, skip: int, limit: int):
+    """Original listing: count, then find, sequentially"""
+    total = await collection.count_documents(filter_query)
+    data = await collection.find(filter_query).skip(skip).limit(limit).to_list(length=limit)
+    return data, total
+
+
+async def list_after(collection, filter_query: dict, skip: int, limit: int, total_mode: str):
+    return await fetch_page(
+        collection, filter_query, filter_query,
+        sort_spec("createdAt", 1), skip, limit, total_mode
+    )
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+    }
+
+
+async def measure(fn, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--skip", type=int, default=0)
+    parser.add_argument("--db", default="tradinghub_bench")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[args.db]
+    collection = db.providers
+
+    try:
+        await seed(collection, args.docs)
+        await ensure_indexes(db)
+
+        results = {}
+        for name, filter_query in QUERIES.items():
+            results[name] = {
+                "before": await measure(lambda: list_before(collection, filter_query, args.skip, args.limit), args.iterations),
+                "after_exact": await measure(lambda: list_after(collection, filter_query, args.skip, args.limit, "exact"), args.iterations),
+                "after_estimated": await measure(lambda: list_after(collection, filter_query, args.skip, args.limit, "estimated"), args.iterations),
+                "after_none": await measure(lambda: list_after(collection, filter_query, args.skip, args.limit, "none"), args.iterations),
+            }
+
+        print(json.dumps({"docs": args.docs, "limit": args.limit, "skip": args.skip, "results": results}, indent=2))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
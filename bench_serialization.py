@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+TradingHub response serialization benchmark
+Measures the cost of turning one 100-item provider page into response bytes:
+
+  before -- Provider(**doc) per item, then FastAPI's response_model path
+            (dump, re-validate against ProviderListResponse, jsonable_encoder,
+            stdlib json)
+  after  -- Provider(**doc) per item, then model_response()
+            (single pydantic-core model_dump_json)
+
+No database is needed; documents are synthesized in memory.
+
+Usage:
+    python bench_serialization.py --items 100 --iterations 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from fastapi.responses import JSONResponse
+
+from bench_list_queries import make_provider
+from models import Provider, ProviderListResponse
+from responses import model_response
+
+
+async def before(docs, field):
+    payload = ProviderListResponse(success=True, data=[Provider(**doc) for doc in docs], total=len(docs))
+    content = await serialize_response(field=field, response_content=payload)
+    return JSONResponse(content=content).body
+
+
+async def after(docs, field):
+    payload = ProviderListResponse(success=True, data=[Provider(**doc) for doc in docs], total=len(docs))
+    return model_response(payload).body
+
+
+async def measure(fn, docs, field, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn(docs, field)
+        samples.append(time.perf_counter() - start)
+    ordered = sorted(samples)
+    return {
+        "p50_us": round(statistics.median(ordered) * 1e6, 1),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    docs = [make_provider(i, rng, base_time) for i in range(args.items)]
+    field = create_response_field(name="response", type_=ProviderListResponse)
+
+    assert json.loads(await before(docs, field)) == json.loads(await after(docs, field))
+
+    results = {
+        "before": await measure(before, docs, field, args.iterations),
+        "after": await measure(after, docs, field, args.iterations),
+    }
+    print(json.dumps({"items": args.items, "iterations": args.iterations, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+TradingHub cold-start benchmark
+Starts the API through launcher.py several times and measures, from process
+spawn, how long until /api/health first answers and until it reports
+ready (indexes reconciled, seed checked, suggest index built).
+
+--fresh drops the benchmark database before every run, so each start has
+to build indexes and seed; without it the runs measure a warm database.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python bench_startup.py --runs 5 --workers 4 --fresh
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from pymongo import MongoClient
+
+from bench_list_queries import percentiles
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def start_once(args) -> dict:
+    if args.fresh:
+        MongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017")).drop_database(args.db)
+
+    url = f"http://127.0.0.1:{args.port}/api/health"
+    env = {**os.environ, "DB_NAME": args.db}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "launcher.py"), "--workers", str(args.workers),
+         "--port", str(args.port), "--host", "127.0.0.1", "--no-access-log", "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    first_response = None
+    ready = None
+    try:
+        while time.perf_counter() - started < args.timeout:
+            try:
+                body = httpx.get(url, timeout=1).json()
+                if first_response is None:
+                    first_response = time.perf_counter() - started
+                if body.get("ready"):
+                    ready = time.perf_counter() - started
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if ready is None:
+        raise RuntimeError("Server did not become ready")
+    return {"health": first_response, "ready": ready}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--db", default="tradinghub_bench_startup")
+    parser.add_argument("--fresh", action="store_true", help="Drop the database before every start")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    runs = [start_once(args) for _ in range(args.runs)]
+    print(json.dumps({
+        "runs": args.runs,
+        "workers": args.workers,
+        "fresh": args.fresh,
+        "first_health": percentiles([run["health"] for run in runs]),
+        "ready": percentiles([run["ready"] for run in runs]),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+TradingHub worker scaling benchmark
+Starts the API through launcher.py with 1, 2, 4 and 8 workers and drives
+each with the same closed-loop HTTP load (several client processes, each
+holding a fixed number of concurrent keep-alive requests), reporting
+throughput and latency percentiles per worker count.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python bench_workers.py --workers 1,2,4,8 --duration 15
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench_list_queries import percentiles
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Request mix: catalog reads as the frontend issues them
+PATHS = [
+    "/api/providers/?limit=20",
+    "/api/providers/?signalType=Forex&limit=20",
+    "/api/brokers/?limit=20",
+    "/api/testimonials/",
+    "/api/providers/1",
+]
+
+
+async def _client(base_url: str, concurrency: int, duration: float, cache_bust: bool) -> dict:
+    samples = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def loop(slot: int):
+            nonlocal errors
+            i = slot
+            while time.perf_counter() < deadline:
+                path = PATHS[i % len(PATHS)]
+                if cache_bust:
+                    # Distinct query strings defeat the per-worker response cache
+                    path += ("&" if "?" in path else "?") + f"skip={i % 50}"
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                samples.append(time.perf_counter() - start)
+                i += concurrency
+
+        await asyncio.gather(*(loop(slot) for slot in range(concurrency)))
+
+    return {"samples": samples, "errors": errors}
+
+
+def _client_process(base_url: str, concurrency: int, duration: float, cache_bust: bool, queue):
+    queue.put(asyncio.run(_client(base_url, concurrency, duration, cache_bust)))
+
+
+def _wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + "/api/providers/?limit=1", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Server did not become ready")
+
+
+def run(workers: int, args) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "launcher.py"), "--workers", str(workers),
+         "--port", str(args.port), "--host", "127.0.0.1", "--no-access-log", "--log-level", "warning"],
+        cwd=ROOT
+    )
+    try:
+        _wait_ready(base_url)
+        # Let every worker finish its lifespan (index check, suggest index)
+        time.sleep(2)
+
+        queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=_client_process,
+                args=(base_url, args.concurrency, args.duration, args.cache_bust, queue)
+            )
+            for _ in range(args.clients)
+        ]
+        for process in clients:
+            process.start()
+        results = [queue.get() for _ in clients]
+        for process in clients:
+            process.join()
+
+        samples = [sample for result in results for sample in result["samples"]]
+        return {
+            "workers": workers,
+            "requests": len(samples),
+            "errors": sum(result["errors"] for result in results),
+            "rps": round(len(samples) / args.duration, 1),
+            **percentiles(samples),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent requests per client process")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--cache-bust", action="store_true", help="Vary query strings so reads reach Mongo")
+    args = parser.parse_args()
+
+    results = [run(int(workers), args) for workers in args.workers.split(",")]
+    print(json.dumps({
+        "duration_s": args.duration,
+        "clients": args.clients,
+        "concurrency": args.concurrency,
+        "cache_bust": args.cache_bust,
+        "cpus": os.cpu_count(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
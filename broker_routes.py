@@ -1,8 +1,20 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
-from models import Broker, BrokerCreate, BrokerUpdate, BrokerListResponse, BrokerResponse
-from database import database
+from models import Broker, BrokerCreate, BrokerUpdate, BrokerListResponse, BrokerResponse, FacetsResponse
+from dependencies import get_db, get_auth
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from auth import EmergentAuth
+from cache import get_cache, cached
+from versioning import bump_version
+from typeahead import suggest_index
+from bulk import BulkImporter, run_bulk
+from export import export_response
+from facets import ValueFacet, RangeFacet, merge_clauses, facet_counts
+from fieldsets import resolve_fields, projection_for, trim, sparse_response
+from responses import model_response
+from timing import timed
+from pagination import parse_sort, sort_spec, apply_cursor, next_cursor, fetch_page, text_search, text_score_sort
+from pymongo import ReturnDocument
 from datetime import datetime, timezone
 import uuid
 import logging
@@ -11,108 +23,225 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/brokers", tags=["brokers"])
 
-# Initialize auth instance  
-auth = EmergentAuth(database.db)
+# Response cache for the read routes, cleared by every write below
+broker_cache = get_cache("brokers")
+
+# Fields accepted by ?sort= (each backed by a (field, id) index)
+SORT_FIELDS = ["createdAt", "rating", "minDeposit", "spreadsFrom"]
+
+# "Up to $X" thresholds offered by the minDeposit filter
+DEPOSIT_RANGES = {
+    "100": (None, 100),
+    "250": (None, 250),
+    "500": (None, 500),
+    "1000": (None, 1000),
+}
+
+# Facet counted for each filter parameter of the list route
+BROKER_FACETS = {
+    "instrumentType": ValueFacet("instruments", unwind=True),
+    "minDeposit": RangeFacet("minDeposit", DEPOSIT_RANGES),
+    "regulation": ValueFacet("regulation", unwind=True),
+}
+
+def _filter_clauses(instrumentType: Optional[str], minDeposit: Optional[str],
+                    regulation: Optional[str], search: Optional[str]) -> dict:
+    """Query fragment of each applied list filter, keyed by its parameter"""
+    clauses = {}
+    
+    # Instrument type filter
+    if instrumentType and instrumentType != "all":
+        clauses["instrumentType"] = {"instruments": instrumentType}
+    
+    # Min deposit filter
+    if minDeposit and minDeposit != "all":
+        max_deposit = int(minDeposit)
+        clauses["minDeposit"] = {"minDeposit": {"$lte": max_deposit}}
+    
+    # Regulation filter
+    if regulation and regulation != "all":
+        clauses["regulation"] = {"regulation": regulation}
+    
+    # Search filter
+    if search:
+        search_regex = {"$regex": search, "$options": "i"}
+        clauses["search"] = {"$or": [
+            {"name": search_regex},
+            {"instruments": {"$elemMatch": search_regex}}
+        ]}
+    
+    return clauses
 
 @router.get("/", response_model=BrokerListResponse)
+@cached(broker_cache)
 async def get_brokers(
     instrumentType: Optional[str] = Query(None, description="Filter by instrument type"),
     minDeposit: Optional[str] = Query(None, description="Filter by minimum deposit"), 
     regulation: Optional[str] = Query(None, description="Filter by regulation"),
     search: Optional[str] = Query(None, description="Search in name and instruments"),
+    sort: str = Query("createdAt", description="Sort field, prefix with - for descending"),
+    cursor: Optional[str] = Query(None, description="Opaque nextCursor from the previous page (replaces skip)"),
+    total: str = Query("exact", pattern="^(exact|estimated|none)$", description="Total count mode: exact, estimated or none"),
+    view: str = Query("full", pattern="^(card|full)$", description="Predefined field set: card or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (overrides view)"),
     limit: int = Query(50, ge=1, le=100),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get all brokers with optional filters"""
     try:
-        # Build filter query
-        filter_query = {}
+        sort_field, sort_direction = parse_sort(sort, SORT_FIELDS)
+        selected = resolve_fields("brokers", Broker, view, fields)
         
-        # Instrument type filter
-        if instrumentType and instrumentType != "all":
-            filter_query["instruments"] = instrumentType
-        
-        # Min deposit filter
-        if minDeposit and minDeposit != "all":
-            max_deposit = int(minDeposit)
-            filter_query["minDeposit"] = {"$lte": max_deposit}
-        
-        # Regulation filter
-        if regulation and regulation != "all":
-            filter_query["regulation"] = regulation
-        
-        # Search filter
-        if search:
-            search_regex = {"$regex": search, "$options": "i"}
-            filter_query["$or"] = [
-                {"name": search_regex},
-                {"instruments": {"$elemMatch": search_regex}}
-            ]
+        # Build filter query
+        filter_query = merge_clauses(_filter_clauses(instrumentType, minDeposit, regulation, search))
         
-        # Get total count
-        total = await database.db.brokers.count_documents(filter_query)
+        # Get brokers page and total concurrently, with keyset pagination
+        # (or legacy skip when no cursor)
+        page_query = apply_cursor(filter_query, cursor, sort, sort_field, sort_direction)
+        brokers_data, total_count = await fetch_page(
+            db.brokers,
+            filter_query,
+            page_query,
+            sort_spec(sort_field, sort_direction),
+            0 if cursor else skip,
+            limit,
+            total,
+            projection=projection_for(selected, [sort_field])
+        )
+        cursor_next = next_cursor(brokers_data, limit, sort, sort_field)
         
-        # Get brokers with pagination
-        cursor = database.db.brokers.find(filter_query).skip(skip).limit(limit)
-        brokers_data = await cursor.to_list(length=limit)
+        if selected:
+            return sparse_response(
+                data=[trim(broker_data, selected) for broker_data in brokers_data],
+                total=total_count,
+                nextCursor=cursor_next
+            )
         
-        brokers = [Broker(**broker_data) for broker_data in brokers_data]
+        with timed("model"):
+            brokers = [Broker(**broker_data) for broker_data in brokers_data]
         
-        return BrokerListResponse(
+        return model_response(BrokerListResponse(
             success=True,
             data=brokers,
-            total=total
-        )
+            total=total_count,
+            nextCursor=cursor_next
+        ))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting brokers: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get brokers")
 
-@router.get("/search")
+@router.get("/search", response_model=BrokerListResponse)
+@cached(broker_cache)
 async def search_brokers(
     q: str = Query(..., description="Search query"),
-    limit: int = Query(20, ge=1, le=50)
+    limit: int = Query(20, ge=1, le=50),
+    skip: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Search brokers by name or instruments"""
+    """Search brokers by name, instruments or regulation, ranked by text relevance"""
     try:
-        search_regex = {"$regex": q, "$options": "i"}
-        filter_query = {
-            "$or": [
-                {"name": search_regex},
-                {"instruments": {"$elemMatch": search_regex}}
-            ]
-        }
+        filter_query, projection = text_search(q)
         
-        cursor = database.db.brokers.find(filter_query).limit(limit)
-        brokers_data = await cursor.to_list(length=limit)
+        brokers_data, total = await fetch_page(
+            db.brokers,
+            filter_query,
+            filter_query,
+            text_score_sort(),
+            skip,
+            limit,
+            projection=projection
+        )
         
-        brokers = [Broker(**broker_data) for broker_data in brokers_data]
+        with timed("model"):
+            brokers = [Broker(**broker_data) for broker_data in brokers_data]
         
-        return BrokerListResponse(
+        return model_response(BrokerListResponse(
             success=True,
             data=brokers,
-            total=len(brokers)
-        )
+            total=total
+        ))
         
     except Exception as e:
         logger.error(f"Error searching brokers: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to search brokers")
 
+@router.get("/facets", response_model=FacetsResponse)
+@cached(broker_cache)
+async def get_broker_facets(
+    instrumentType: Optional[str] = Query(None, description="Filter by instrument type"),
+    minDeposit: Optional[str] = Query(None, description="Filter by minimum deposit"), 
+    regulation: Optional[str] = Query(None, description="Filter by regulation"),
+    search: Optional[str] = Query(None, description="Search in name and instruments"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Per-value broker counts for every filter, given the other applied filters"""
+    try:
+        clauses = _filter_clauses(instrumentType, minDeposit, regulation, search)
+        facets, total = await facet_counts(db.brokers, clauses, BROKER_FACETS)
+        
+        return model_response(FacetsResponse(
+            success=True,
+            facets=facets,
+            total=total
+        ))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting broker facets: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get broker facets")
+
+@router.get("/export")
+async def export_brokers(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    batchSize: int = Query(1000, ge=1, le=10000, description="Documents fetched per cursor batch"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
+):
+    """Stream every broker as NDJSON or CSV (Admin only)"""
+    try:
+        # Require admin authentication
+        await auth.require_admin(request)
+        
+        return export_response(db.brokers, Broker, format, batchSize)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting brokers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export brokers")
+
 @router.get("/{broker_id}", response_model=BrokerResponse)
-async def get_broker(broker_id: str):
+@cached(broker_cache)
+async def get_broker(
+    broker_id: str,
+    view: str = Query("full", pattern="^(card|full)$", description="Predefined field set: card or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (overrides view)"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Get single broker by ID"""
     try:
-        broker_data = await database.db.brokers.find_one({"id": broker_id})
+        selected = resolve_fields("brokers", Broker, view, fields)
+        broker_data = await db.brokers.find_one({"id": broker_id}, projection_for(selected))
         
         if not broker_data:
             raise HTTPException(status_code=404, detail="Broker not found")
         
-        broker = Broker(**broker_data)
+        if selected:
+            return sparse_response(data=trim(broker_data, selected))
+        
+        with timed("model"):
+            broker = Broker(**broker_data)
         
-        return BrokerResponse(
+        return model_response(BrokerResponse(
             success=True,
             data=broker
-        )
+        ))
         
     except HTTPException:
         raise
@@ -123,7 +252,9 @@ async def get_broker(broker_id: str):
 @router.post("/", response_model=BrokerResponse)
 async def create_broker(
     broker_data: BrokerCreate,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Create new broker (Admin only)"""
     try:
@@ -139,13 +270,16 @@ async def create_broker(
         )
         
         # Insert into database
-        await database.db.brokers.insert_one(new_broker.dict())
+        await db.brokers.insert_one(new_broker.dict())
+        broker_cache.clear()
+        await bump_version(db, "brokers")
+        suggest_index.upsert("brokers", new_broker.dict())
         
-        return BrokerResponse(
+        return model_response(BrokerResponse(
             success=True,
             data=new_broker,
             message="Broker created successfully"
-        )
+        ))
         
     except HTTPException:
         raise
@@ -153,42 +287,85 @@ async def create_broker(
         logger.error(f"Error creating broker: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create broker")
 
+@router.post("/bulk")
+async def bulk_brokers(
+    request: Request,
+    mode: str = Query("create", pattern="^(create|upsert|update)$", description="create, upsert (by id) or update (partial, by id)"),
+    batchSize: int = Query(1000, ge=1, le=10000, description="Records validated and written per bulk_write"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
+):
+    """Bulk create/upsert/update brokers from a JSON array or NDJSON body (Admin only)"""
+    try:
+        # Require admin authentication (once for the whole import)
+        await auth.require_admin(request)
+        
+        async def on_written(ids):
+            broker_cache.clear()
+            await bump_version(db, "brokers")
+            await suggest_index.refresh(db, "brokers", ids)
+        
+        importer = BulkImporter(
+            db.brokers,
+            mode,
+            batchSize,
+            create_model=BrokerCreate,
+            update_model=BrokerUpdate,
+            model=Broker,
+            on_written=on_written
+        )
+        
+        return await run_bulk(request, importer)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk importing brokers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to bulk import brokers")
+
 @router.put("/{broker_id}", response_model=BrokerResponse)
 async def update_broker(
     broker_id: str,
     broker_update: BrokerUpdate,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Update broker (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if broker exists
-        existing_broker = await database.db.brokers.find_one({"id": broker_id})
-        if not existing_broker:
-            raise HTTPException(status_code=404, detail="Broker not found")
-        
         # Prepare update data
         update_data = broker_update.dict(exclude_unset=True)
         if update_data:
             update_data["updatedAt"] = datetime.now(timezone.utc)
             
-            # Update broker
-            await database.db.brokers.update_one(
+            # Update and read back in one operation
+            updated_broker_data = await db.brokers.find_one_and_update(
                 {"id": broker_id},
-                {"$set": update_data}
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
             )
+        else:
+            updated_broker_data = await db.brokers.find_one({"id": broker_id})
         
-        # Get updated broker
-        updated_broker_data = await database.db.brokers.find_one({"id": broker_id})
-        updated_broker = Broker(**updated_broker_data)
+        if not updated_broker_data:
+            raise HTTPException(status_code=404, detail="Broker not found")
+        
+        if update_data:
+            broker_cache.clear()
+            await bump_version(db, "brokers")
+        suggest_index.upsert("brokers", updated_broker_data)
+        
+        with timed("model"):
+            updated_broker = Broker(**updated_broker_data)
         
-        return BrokerResponse(
+        return model_response(BrokerResponse(
             success=True,
             data=updated_broker,
             message="Broker updated successfully"
-        )
+        ))
         
     except HTTPException:
         raise
@@ -199,20 +376,22 @@ async def update_broker(
 @router.delete("/{broker_id}")
 async def delete_broker(
     broker_id: str,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Delete broker (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if broker exists
-        existing_broker = await database.db.brokers.find_one({"id": broker_id})
-        if not existing_broker:
-            raise HTTPException(status_code=404, detail="Broker not found")
-        
         # Delete broker
-        await database.db.brokers.delete_one({"id": broker_id})
+        result = await db.brokers.delete_one({"id": broker_id})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Broker not found")
+        broker_cache.clear()
+        await bump_version(db, "brokers")
+        suggest_index.remove("brokers", broker_id)
         
         return {
             "success": True,
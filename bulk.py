@@ -0,0 +1,212 @@
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from datetime import datetime, timezone
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+# Cap on per-item errors echoed back; the full count is always reported
+MAX_REPORTED_ERRORS = 1000
+
+BULK_MODES = ("create", "upsert", "update")
+
+
+async def read_records(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (index, record) from a JSON array body or a streamed NDJSON body"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_TYPES:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, _parse_line(line, index)
+                    index += 1
+        if buffer.strip():
+            yield index, _parse_line(buffer, index)
+        return
+
+    try:
+        records = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for index, record in enumerate(records):
+        yield index, record
+
+
+def _parse_line(line: bytes, index: int) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        # Surfaced as a per-item error by the importer
+        return _InvalidLine(f"Invalid JSON on line {index + 1}: {str(e)}")
+
+
+class _InvalidLine:
+    def __init__(self, message: str):
+        self.message = message
+
+
+class BulkImporter:
+    """Validates records in batches and writes them with unordered bulk_write.
+
+    Modes:
+      create -- insert every record as a new document with a generated id
+      upsert -- full records keyed on "id", inserted or replaced field by field
+      update -- partial records keyed on "id"; unknown ids are reported as errors
+    """
+
+    def __init__(self, collection, mode: str, batch_size: int,
+                 create_model: Type[BaseModel], update_model: Type[BaseModel], model: Type[BaseModel],
+                 on_written: Optional[Callable[[List[str]], Awaitable[None]]] = None):
+        self.collection = collection
+        self.mode = mode
+        self.batch_size = batch_size
+        self.create_model = create_model
+        self.update_model = update_model
+        self.model = model
+        self.on_written = on_written
+        # Only models with an updatedAt field get it stamped
+        self.stamp_updated = "updatedAt" in model.model_fields
+
+        self.received = 0
+        self.inserted = 0
+        self.upserted = 0
+        self.matched = 0
+        self.modified = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+
+        self._batch: List[Tuple[int, str, Any]] = []
+
+    def _error(self, index: int, message: Any, doc_id: Optional[str] = None):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            error = {"index": index, "error": message}
+            if doc_id is not None:
+                error["id"] = doc_id
+            self.errors.append(error)
+
+    def _to_operation(self, index: int, record: Any) -> Optional[Tuple[str, Any]]:
+        """Validate one record and build its write; returns None on error"""
+        if isinstance(record, _InvalidLine):
+            self._error(index, record.message)
+            return None
+        if not isinstance(record, dict):
+            self._error(index, "Record must be a JSON object")
+            return None
+
+        now = datetime.now(timezone.utc)
+        doc_id = record.get("id")
+
+        try:
+            if self.mode == "create":
+                data = self.create_model(**record).dict()
+                doc = {"id": str(uuid.uuid4()), **data, "createdAt": now}
+                if self.stamp_updated:
+                    doc["updatedAt"] = now
+                document = self.model(**doc).dict()
+                return document["id"], InsertOne(document)
+
+            if not isinstance(doc_id, str) or not doc_id:
+                self._error(index, "Field 'id' is required in upsert and update modes")
+                return None
+
+            if self.mode == "upsert":
+                update_data = self.create_model(**record).dict()
+                on_insert = {"createdAt": now}
+                upsert = True
+            else:
+                update_data = self.update_model(**record).dict(exclude_unset=True)
+                on_insert = None
+                upsert = False
+        except ValidationError as e:
+            self._error(index, [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()], doc_id)
+            return None
+
+        if self.stamp_updated:
+            update_data["updatedAt"] = now
+        update = {"$set": update_data}
+        if on_insert:
+            update["$setOnInsert"] = on_insert
+        return doc_id, UpdateOne({"id": doc_id}, update, upsert=upsert)
+
+    async def add(self, index: int, record: Any):
+        self.received += 1
+        operation = self._to_operation(index, record)
+        if operation is None:
+            return
+        self._batch.append((index, *operation))
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        if self.mode == "update":
+            # One existence check per batch so unknown ids get per-item errors
+            ids = [doc_id for _, doc_id, _ in batch]
+            existing = {
+                doc["id"] async for doc in self.collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1})
+            }
+            missing = [item for item in batch if item[1] not in existing]
+            for index, doc_id, _ in missing:
+                self._error(index, "Document not found", doc_id)
+            batch = [item for item in batch if item[1] in existing]
+            if not batch:
+                return
+
+        failed = set()
+        try:
+            result = await self.collection.bulk_write([op for _, _, op in batch], ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for write_error in details.get("writeErrors", []):
+                index, doc_id, _ = batch[write_error["index"]]
+                failed.add(write_error["index"])
+                self._error(index, write_error.get("errmsg", "Write failed"), doc_id)
+
+        self.inserted += details.get("nInserted", 0)
+        self.upserted += details.get("nUpserted", 0)
+        self.matched += details.get("nMatched", 0)
+        self.modified += details.get("nModified", 0)
+
+        if self.on_written:
+            written = [doc_id for position, (_, doc_id, _) in enumerate(batch) if position not in failed]
+            if written:
+                await self.on_written(written)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "success": self.error_count == 0,
+            "received": self.received,
+            "inserted": self.inserted,
+            "upserted": self.upserted,
+            "matched": self.matched,
+            "modified": self.modified,
+            "errorCount": self.error_count,
+            "errors": sorted(self.errors, key=lambda error: error["index"]),
+        }
+
+
+async def run_bulk(request: Request, importer: BulkImporter) -> Dict[str, Any]:
+    """Feed every record of the request body through ``importer``"""
+    async for index, record in read_records(request):
+        await importer.add(index, record)
+    await importer.flush()
+    return importer.summary()
@@ -0,0 +1,229 @@
+from cachetools import TTLCache, TLRUCache
+from starlette.responses import Response
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
+from fastapi import params
+import functools
+import inspect
+import os
+import logging
+
+from metrics import Collector, register
+from timing import note
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAXSIZE = 1024
+
+_MISSING = object()
+
+
+class _CountingMixin:
+    """Counts entries evicted for capacity (LRU) or expiry"""
+
+    evictions = 0
+    expirations = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+    def clear(self):
+        # MutableMapping.clear() goes through popitem(); not an eviction
+        evictions = self.evictions
+        super().clear()
+        self.evictions = evictions
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        self.expirations += len(expired)
+        return expired
+
+
+class _CountingTTLCache(_CountingMixin, TTLCache):
+    pass
+
+
+class _CountingTLRUCache(_CountingMixin, TLRUCache):
+    pass
+
+
+class ResponseCache:
+    """Bounded LRU + TTL cache for read-only route responses.
+
+    ``ttu`` optionally gives each entry its own expiry: it is called as
+    ``ttu(key, value, now)`` and returns the monotonic time the entry expires,
+    which is then capped at ``now + ttl``.
+
+    ``maxsize``/``ttl`` are defaults, overridden by ``<env_prefix>_MAX_ENTRIES``
+    / ``<env_prefix>_TTL_SECONDS``. Those are read on first use, not at
+    import: route modules create their caches before .env is loaded.
+    """
+
+    def __init__(self, name: str, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL,
+                 ttu: Optional[Callable[[Hashable, Any, float], float]] = None, env_prefix: str = "CACHE"):
+        self.name = name
+        self.env_prefix = env_prefix
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._ttu = ttu
+        self._settings_read = False
+        self._store = None
+        # Bumped on every invalidation so reads that started before a write
+        # never store their (stale) result afterwards
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _read_settings(self):
+        if not self._settings_read:
+            self._maxsize = int(os.environ.get(f'{self.env_prefix}_MAX_ENTRIES', self._maxsize))
+            self._ttl = float(os.environ.get(f'{self.env_prefix}_TTL_SECONDS', self._ttl))
+            self._settings_read = True
+
+    @property
+    def ttl(self) -> float:
+        self._read_settings()
+        return self._ttl
+
+    @property
+    def _cache(self):
+        if self._store is None:
+            self._read_settings()
+            maxsize, ttl, ttu = self._maxsize, self._ttl, self._ttu
+            if ttu is None:
+                self._store = _CountingTTLCache(maxsize, ttl)
+            else:
+                self._store = _CountingTLRUCache(maxsize, lambda key, value, now: min(ttu(key, value, now), now + ttl))
+        return self._store
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._cache[key] = value
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of the live entries"""
+        return list(self._cache.items())
+
+    def pop(self, key: Hashable):
+        """Drop one entry by key"""
+        self._cache.pop(key, None)
+        self.generation += 1
+        self.invalidations += 1
+
+    def discard(self, predicate: Callable[[Hashable, Any], bool]):
+        """Drop the entries matching ``predicate(key, value)``"""
+        for key, value in list(self._cache.items()):
+            if predicate(key, value):
+                self._cache.pop(key, None)
+        self.generation += 1
+        self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry (called by the write handlers)"""
+        self._cache.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._cache.evictions,
+            "expirations": self._cache.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# All response caches by name, for monitoring
+caches: Dict[str, ResponseCache] = {}
+
+
+def get_cache(name: str, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL,
+              ttu: Optional[Callable[[Hashable, Any, float], float]] = None,
+              env_prefix: str = "CACHE") -> ResponseCache:
+    """Get or create the named response cache"""
+    if name not in caches:
+        caches[name] = ResponseCache(name, maxsize, ttl, ttu, env_prefix)
+    return caches[name]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def _collect(field: str) -> Callable[[], Dict[Tuple[str], float]]:
+    return lambda: {(name,): cache.stats()[field] for name, cache in caches.items()}
+
+
+register(Collector("response_cache_hits_total", "Response cache hits", ("cache",), _collect("hits"), type="counter"))
+register(Collector("response_cache_misses_total", "Response cache misses", ("cache",), _collect("misses"), type="counter"))
+register(Collector("response_cache_hit_ratio", "Response cache hits / lookups", ("cache",), _collect("hitRatio")))
+register(Collector("response_cache_entries", "Entries held by the response cache", ("cache",), _collect("size")))
+
+
+def injected_params(func: Callable) -> FrozenSet[str]:
+    """Parameters of a route handler resolved with Depends() (per-worker
+    services such as the database), which are never part of a cache key"""
+    injected = set()
+    for name, parameter in inspect.signature(func).parameters.items():
+        metadata = getattr(parameter.annotation, "__metadata__", ())
+        if isinstance(parameter.default, params.Depends) or any(isinstance(m, params.Depends) for m in metadata):
+            injected.add(name)
+    return frozenset(injected)
+
+
+def make_key(route: str, values: Dict[str, Any], exclude: FrozenSet[str] = frozenset()) -> Hashable:
+    """Normalize route parameters into a cache key (order independent)"""
+    return (route, tuple(sorted((name, value) for name, value in values.items() if name not in exclude)))
+
+
+def _clone_response(response: Response) -> Response:
+    """Copy of a rendered response, so middleware editing headers on one send
+    never leaks into the cached entry"""
+    clone = Response(content=response.body, status_code=response.status_code)
+    clone.raw_headers = list(response.raw_headers)
+    return clone
+
+
+def cached(cache: ResponseCache):
+    """Read-through cache decorator for GET route handlers.
+
+    Handlers are keyed on their name and keyword arguments, so only use it on
+    routes whose parameters are plain query/path values (plus dependencies
+    injected with Depends(), which are left out of the key). Exceptions (404s,
+    validation errors) are never cached.
+    """
+    def decorator(func):
+        exclude = injected_params(func)
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            key = make_key(func.__name__, kwargs, exclude)
+            value = cache.get(key)
+            if value is not _MISSING:
+                note("cache", "hit")
+                return _clone_response(value) if isinstance(value, Response) else value
+
+            note("cache", "miss")
+            generation = cache.generation
+            value = await func(**kwargs)
+            cache.set(key, _clone_response(value) if isinstance(value, Response) else value, generation)
+            return value
+        return wrapper
+    return decorator
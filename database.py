@@ -1,28 +1,54 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
 import os
 from models import Provider, Broker, Testimonial
-from datetime import datetime, timezone
+from indexes import ensure_indexes
+from monitoring import pool_stats, command_stats
+from slow_commands import slow_command_monitor
+from timing import mongo_timing
+from versioning import bump_version
+from datetime import datetime, timezone, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Holds the seed marker document {_id: "seed", state, lockedUntil, completedAt}
+META_COLLECTION = "app_meta"
+
+# How long a seeding worker holds the marker before others may take over
+SEED_LOCK_TTL = timedelta(seconds=60)
+
 class Database:
     def __init__(self):
         self.client: AsyncIOMotorClient = None
         self.db: AsyncIOMotorDatabase = None
     
     async def connect(self):
-        """Connect to MongoDB"""
+        """Connect to MongoDB (the client connects lazily, so this never blocks)"""
         mongo_url = os.environ.get('MONGO_URL')
         db_name = os.environ.get('DB_NAME', 'tradinghub')
         
-        self.client = AsyncIOMotorClient(mongo_url)
+        self.client = AsyncIOMotorClient(mongo_url, event_listeners=[pool_stats, command_stats, slow_command_monitor, mongo_timing])
         self.db = self.client[db_name]
         
         logger.info(f"Connected to MongoDB: {db_name}")
+    
+    async def prepare(self):
+        """Reconcile indexes and seed, run in the background after connect()"""
+        # Reconcile indexes with the registry (set ENSURE_INDEXES=false when
+        # indexes are built ahead of deploy with `python indexes.py`)
+        if os.environ.get('ENSURE_INDEXES', 'true').lower() != 'false':
+            await self._ensure_indexes()
         
-        # Initialize with seed data if collections are empty
-        await self._seed_data()
+        # Initialize with seed data if collections are empty (set
+        # SEED_ON_STARTUP=false when seeding with `python database.py`)
+        if os.environ.get('SEED_ON_STARTUP', 'true').lower() != 'false':
+            try:
+                await self.seed()
+            except Exception as e:
+                logger.error(f"Error seeding data: {str(e)}")
     
     async def disconnect(self):
         """Disconnect from MongoDB"""
@@ -30,28 +56,85 @@ class Database:
             self.client.close()
             logger.info("Disconnected from MongoDB")
     
-    async def _seed_data(self):
-        """Seed database with initial mock data"""
+    async def _ensure_indexes(self):
+        """Create missing indexes and report drift"""
+        try:
+            report = await ensure_indexes(self.db)
+            drift = {name: d for name, d in report.items() if any(d.values())}
+            if drift:
+                logger.info(f"Index reconciliation: {drift}")
+        except Exception as e:
+            logger.error(f"Error ensuring indexes: {str(e)}")
+    
+    async def seed(self, force: bool = False) -> bool:
+        """Seed empty collections with initial mock data, once per database.
+        
+        The first process to claim the marker document seeds; concurrent
+        workers and every later start skip. Seed documents are upserted on
+        ``id`` with $setOnInsert, so a re-run (``force``, or after a crash)
+        only adds what is missing and never overwrites edits.
+        """
+        meta = self.db[META_COLLECTION]
+        now = datetime.now(timezone.utc)
+        
+        if not force:
+            marker = await meta.find_one({"_id": "seed"})
+            if marker and marker.get("state") == "done":
+                return False
+        
+        try:
+            # Claim the marker unless another worker holds a live lock
+            await meta.find_one_and_update(
+                {"_id": "seed", "$or": [{"state": {"$ne": "running"}}, {"lockedUntil": {"$lt": now}}]},
+                {"$set": {"state": "running", "lockedUntil": now + SEED_LOCK_TTL}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            logger.info("Seeding already in progress in another worker")
+            return False
+        
         try:
-            # Check if collections are empty
-            provider_count = await self.db.providers.count_documents({})
-            broker_count = await self.db.brokers.count_documents({})
-            testimonial_count = await self.db.testimonials.count_documents({})
+            seeders = {
+                "providers": self._seed_providers,
+                "brokers": self._seed_brokers,
+                "testimonials": self._seed_testimonials,
+            }
             
-            if provider_count == 0:
-                await self._seed_providers()
-                logger.info("Seeded providers collection")
+            # Check if collections are empty (concurrently)
+            firsts = await asyncio.gather(*(
+                self.db[name].find_one({}, {"_id": 1}) for name in seeders
+            ))
+            seeded = []
+            for (name, seeder), first in zip(seeders.items(), firsts):
+                if force or first is None:
+                    await seeder()
+                    seeded.append(name)
+                    logger.info(f"Seeded {name} collection")
             
-            if broker_count == 0:
-                await self._seed_brokers()
-                logger.info("Seeded brokers collection")
-                
-            if testimonial_count == 0:
-                await self._seed_testimonials()
-                logger.info("Seeded testimonials collection")
-                
-        except Exception as e:
-            logger.error(f"Error seeding data: {str(e)}")
+            await meta.update_one(
+                {"_id": "seed"},
+                {"$set": {"state": "done", "completedAt": datetime.now(timezone.utc)}, "$unset": {"lockedUntil": ""}}
+            )
+            # Workers that are already serving drop their caches on the bump
+            for name in seeded:
+                await bump_version(self.db, name)
+            return True
+        except Exception:
+            # Release the lock so the next start retries
+            await meta.update_one({"_id": "seed"}, {"$set": {"state": "failed"}, "$unset": {"lockedUntil": ""}})
+            raise
+    
+    async def _upsert_seed(self, collection, docs):
+        """Insert the seed documents that do not exist yet, keyed on id"""
+        try:
+            await collection.bulk_write(
+                [UpdateOne({"id": doc["id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # A concurrent upsert of the same id won the race; anything else is real
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
     
     async def _seed_providers(self):
         """Seed providers collection"""
@@ -166,7 +249,7 @@ class Database:
             }
         ]
         
-        await self.db.providers.insert_many(providers)
+        await self._upsert_seed(self.db.providers, providers)
     
     async def _seed_brokers(self):
         """Seed brokers collection"""
@@ -273,7 +356,7 @@ class Database:
             }
         ]
         
-        await self.db.brokers.insert_many(brokers)
+        await self._upsert_seed(self.db.brokers, brokers)
     
     async def _seed_testimonials(self):
         """Seed testimonials collection"""
@@ -313,7 +396,35 @@ class Database:
             }
         ]
         
-        await self.db.testimonials.insert_many(testimonials)
+        await self._upsert_seed(self.db.testimonials, testimonials)
+
+
+async def _main(argv=None):
+    """Seed a database ahead of (or instead of) worker startup"""
+    import argparse
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Seed the TradingHub database once")
+    parser.add_argument("--force", action="store_true", help="Upsert missing seed documents even if already seeded")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / '.env')
+    database = Database()
+    await database.connect()
+    try:
+        seeded = await database.seed(force=args.force)
+        print("Seeded" if seeded else "Already seeded")
+        return 0
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    import sys
 
-# Global database instance
-database = Database()
\ No newline at end of file
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,338 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from datetime import datetime, timezone, timedelta
+import asyncio
+import math
+import random
+import time
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Synthetic catalog for scale tests and local profiling.
+#
+# Document i of a collection depends only on (seed, collection, i), so the
+# same seed always yields the same catalog whatever the chunk size, and an
+# interrupted run can be resumed: ids are "gen-<i>" and duplicates are skipped.
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 10_000
+# Share of --total per collection
+DEFAULT_MIX = {"providers": 0.40, "brokers": 0.05, "testimonials": 0.25, "users": 0.30}
+
+# Generated documents are spread over these three years
+BASE_TIME = datetime(2022, 1, 1, tzinfo=timezone.utc)
+TIME_SPAN_SECONDS = 3 * 365 * 24 * 3600
+
+SIGNAL_TYPES = {"Forex": 40, "Crypto": 30, "Indices": 10, "Commodities": 8, "CFDs": 6, "Stocks": 4, "DeFi": 2}
+RISK_LEVELS = {"Baixo": 30, "Médio": 50, "Alto": 20}
+REGULATORS = {"CySEC": 30, "FCA": 25, "ASIC": 18, "FSCA": 8, "FSA": 6, "BaFin": 4, "CMVM": 3, "NFA": 3, "Estonia FIU": 3}
+# Regulators capping retail leverage at 1:30
+STRICT_REGULATORS = {"CySEC", "FCA", "ASIC", "BaFin", "CMVM", "NFA"}
+INSTRUMENTS = {"Forex": 35, "CFDs": 20, "Commodities": 12, "Indices": 12, "Crypto": 10, "Stocks": 6, "ETFs": 3, "DeFi": 1, "NFTs": 1}
+MIN_DEPOSITS = {0: 5, 10: 8, 50: 12, 100: 25, 200: 10, 250: 15, 500: 12, 1000: 8, 2000: 3, 5000: 2}
+ACCOUNT_TYPES = ["Standard", "Premium", "VIP", "Basic", "Advanced", "Professional", "ECN", "Islamic"]
+PLATFORMS = {"MT4": 35, "MT5": 30, "WebTrader": 20, "cTrader": 8, "TradingView": 5, "Mobile App": 2}
+WITHDRAWAL_TIMES = {"Instant": 10, "Same day": 20, "24h": 30, "24-48h": 25, "1-3 days": 15}
+SUPPORT_HOURS = {"24/7": 55, "24/5": 40, "Business hours": 5}
+TESTIMONIAL_RATINGS = {5: 60, 4: 25, 3: 8, 2: 4, 1: 3}
+
+NAME_PREFIXES = ["Alpha", "Crypto", "Forex", "Global", "Prime", "Apex", "Blue", "Quantum", "Smart", "Elite",
+                 "Nova", "Trend", "Pip", "Bull", "Gold", "Swift", "Titan", "Vertex", "Zen", "Summit"]
+NAME_CORES = ["Signals", "Trade", "Wave", "Capital", "Markets", "FX", "Pips", "Edge", "Flow", "Pulse"]
+NAME_SUFFIXES = ["", "", "", " Pro", " Elite", " Academy", " Hub", " Lab", " VIP", " Club"]
+BROKER_SUFFIXES = [" Markets", " Global", " Pro", " Trading", " Capital", " FX", " Securities", " Invest"]
+DESCRIPTIONS = [
+    "Estratégias conservadoras com foco em preservação de capital",
+    "Especialistas em movimentos de alta volatilidade",
+    "Scalping intradiário com gestão de risco rigorosa",
+    "Análise técnica e fundamental combinadas para swing trading",
+    "Sinais baseados em price action nos principais pares",
+    "Seguimento de tendência com stops dinâmicos",
+    "Operações de breakout nas sessões de Londres e Nova Iorque",
+    "Carteira diversificada com exposição controlada",
+]
+FIRST_NAMES = ["João", "Maria", "Pedro", "Ana", "Rui", "Inês", "Tiago", "Sofia", "Miguel", "Beatriz",
+               "Carlos", "Marta", "André", "Catarina", "Luís", "Rita", "Paulo", "Joana", "Nuno", "Helena"]
+LAST_NAMES = ["Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa", "Rodrigues", "Martins",
+              "Sousa", "Fernandes", "Gonçalves", "Gomes", "Lopes", "Marques", "Alves", "Almeida"]
+ROLES = ["Trader Profissional", "Day Trader", "Investidor Swing", "Trader Iniciante", "Investidor de Longo Prazo"]
+LOCATIONS = ["Lisboa, Portugal", "Porto, Portugal", "Coimbra, Portugal", "Braga, Portugal", "Faro, Portugal",
+             "São Paulo, Brasil", "Rio de Janeiro, Brasil", "Luanda, Angola", "Maputo, Moçambique"]
+TESTIMONIAL_TEXTS = {
+    5: ["Os signal providers são verificados e os resultados batem certo com as estatísticas.",
+        "Excelente plataforma, consegui finalmente consistência nos meus resultados."],
+    4: ["Muito boa experiência no geral, apenas alguns sinais chegaram tarde.",
+        "Boa seleção de brokers e comparação clara das condições."],
+    3: ["Resultados medianos, mas a informação é transparente."],
+    2: ["Esperava mais dos providers que segui."],
+    1: ["Não tive bons resultados com os sinais."],
+}
+
+
+def _weighted_sample(rng: random.Random, weights: Dict[str, int], k: int) -> List[str]:
+    """k distinct values drawn by weight"""
+    values, cum = list(weights), []
+    total = 0
+    for weight in weights.values():
+        total += weight
+        cum.append(total)
+    chosen: List[str] = []
+    while len(chosen) < min(k, len(values)):
+        value = rng.choices(values, cum_weights=cum)[0]
+        if value not in chosen:
+            chosen.append(value)
+    return chosen
+
+
+def _pick(rng: random.Random, weights: Dict[Any, int]) -> Any:
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def _clip(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def _timestamps(rng: random.Random) -> Tuple[datetime, datetime]:
+    created = BASE_TIME + timedelta(seconds=rng.randrange(TIME_SPAN_SECONDS))
+    updated = created + timedelta(days=rng.expovariate(1 / 30))
+    return created, min(updated, BASE_TIME + timedelta(seconds=TIME_SPAN_SECONDS))
+
+
+def _slug(text: str) -> str:
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return "".join(c for c in ascii_text.lower() if c.isalnum())
+
+
+def make_provider(rng: random.Random, i: int) -> Dict[str, Any]:
+    risk = _pick(rng, RISK_LEVELS)
+    risk_factor = {"Baixo": 0, "Médio": 1, "Alto": 2}[risk]
+    win_rate = int(_clip(rng.gauss(72 - 4 * risk_factor, 9), 35, 97))
+    # Price points like 49, 99, 149, log-normal around 79
+    price = max(9, int(round(_clip(rng.lognormvariate(math.log(79), 0.6), 9, 999) / 10)) * 10 - 1)
+    name = rng.choice(NAME_PREFIXES) + " " + rng.choice(NAME_CORES) + rng.choice(NAME_SUFFIXES)
+    created, updated = _timestamps(rng)
+    return {
+        "id": f"gen-{i}",
+        "name": name,
+        "winRate": win_rate,
+        "tradesLastMonth": int(_clip(rng.lognormvariate(math.log(80), 0.7), 1, 2000)),
+        "signalTypes": _weighted_sample(rng, SIGNAL_TYPES, rng.choices([1, 2, 3], [50, 35, 15])[0]),
+        "subscriptionPrice": price,
+        "currency": "USD",
+        "rating": round(_clip(3.0 + (win_rate - 40) / 60 * 1.8 + rng.gauss(0, 0.3), 1.0, 5.0), 1),
+        # Long tail: most providers have a few dozen followers, a few have many thousands
+        "followers": int(_clip(rng.paretovariate(1.2) * 40, 0, 500_000)),
+        "description": rng.choice(DESCRIPTIONS),
+        "riskLevel": risk,
+        "avgPipsProfitMonthly": int(max(0, rng.gauss(300 + 150 * risk_factor, 150))),
+        "verified": rng.random() < 0.35,
+        "affiliateUrl": f"https://{_slug(name)}.example.com/subscribe?ref={i}",
+        "createdAt": created,
+        "updatedAt": updated,
+    }
+
+
+def make_broker(rng: random.Random, i: int) -> Dict[str, Any]:
+    regulation = _weighted_sample(rng, REGULATORS, rng.choices([1, 2, 3], [45, 40, 15])[0])
+    strict = any(regulator in STRICT_REGULATORS for regulator in regulation)
+    name = rng.choice(NAME_PREFIXES) + rng.choice(BROKER_SUFFIXES)
+    created, updated = _timestamps(rng)
+    return {
+        "id": f"gen-{i}",
+        "name": name,
+        "accountTypes": rng.sample(ACCOUNT_TYPES, rng.randint(2, 4)),
+        "minDeposit": _pick(rng, MIN_DEPOSITS),
+        "maxLeverage": "1:30" if strict and rng.random() < 0.7 else rng.choice(["1:100", "1:200", "1:400", "1:500", "1:1000"]),
+        "spreadsFrom": round(_clip(rng.expovariate(1 / 0.3), 0.0, 3.0), 2),
+        "currency": rng.choices(["USD", "EUR", "GBP"], [70, 25, 5])[0],
+        "bonus": None if strict or rng.random() < 0.5 else f"{rng.choice([20, 50, 100])}% Deposit Bonus até ${rng.choice([500, 1000, 5000])}",
+        "rating": round(_clip(rng.gauss(4.1, 0.4), 1.0, 5.0), 1),
+        "regulation": regulation,
+        "instruments": _weighted_sample(rng, INSTRUMENTS, rng.randint(2, 5)),
+        "platformsSupported": _weighted_sample(rng, PLATFORMS, rng.randint(1, 4)),
+        "withdrawalTime": _pick(rng, WITHDRAWAL_TIMES),
+        "customerSupport": _pick(rng, SUPPORT_HOURS),
+        "verified": rng.random() < 0.6,
+        "affiliateUrl": f"https://{_slug(name)}.example.com/register?ref={i}",
+        "createdAt": created,
+        "updatedAt": updated,
+    }
+
+
+def make_testimonial(rng: random.Random, i: int) -> Dict[str, Any]:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    rating = _pick(rng, TESTIMONIAL_RATINGS)
+    return {
+        "id": f"gen-{i}",
+        "name": f"{first} {last}",
+        "role": rng.choice(ROLES),
+        "avatar": first[0] + last[0],
+        "rating": rating,
+        "text": rng.choice(TESTIMONIAL_TEXTS[rating]),
+        "location": rng.choice(LOCATIONS),
+        # Low ratings are held back for moderation more often
+        "approved": rng.random() < (0.9 if rating >= 4 else 0.5),
+        "createdAt": _timestamps(rng)[0],
+    }
+
+
+def make_user(rng: random.Random, i: int) -> Dict[str, Any]:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    created = _timestamps(rng)[0]
+    return {
+        "id": f"gen-{i}",
+        "email": f"{_slug(first)}.{_slug(last)}.{i}@example.com",
+        "name": f"{first} {last}",
+        "picture": f"https://example.com/avatars/{i}.png" if rng.random() < 0.4 else None,
+        "is_admin": rng.random() < 0.001,
+        "createdAt": created,
+        "lastLogin": created + timedelta(days=rng.expovariate(1 / 60)) if rng.random() < 0.8 else None,
+    }
+
+
+GENERATORS: Dict[str, Callable[[random.Random, int], Dict[str, Any]]] = {
+    "providers": make_provider,
+    "brokers": make_broker,
+    "testimonials": make_testimonial,
+    "users": make_user,
+}
+_SALTS = {name: salt for salt, name in enumerate(GENERATORS, start=1)}
+
+
+def documents(collection: str, count: int, seed: int = DEFAULT_SEED, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """Documents start..count-1 of a collection, each from its own seeded RNG"""
+    make = GENERATORS[collection]
+    rng = random.Random()
+    prefix = (seed << 48) | (_SALTS[collection] << 40)
+    for i in range(start, count):
+        rng.seed(prefix | i)
+        yield make(rng, i)
+
+
+def chunks(collection: str, count: int, seed: int = DEFAULT_SEED, chunk_size: int = DEFAULT_CHUNK_SIZE,
+           start: int = 0) -> Iterator[List[Dict[str, Any]]]:
+    """documents() in lists of chunk_size, so only one chunk is held at a time"""
+    chunk: List[Dict[str, Any]] = []
+    for doc in documents(collection, count, seed, start):
+        chunk.append(doc)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _insert(collection, docs: List[Dict[str, Any]]) -> int:
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        # Documents left by an earlier run; anything else is real
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+async def write_collection(db: AsyncIOMotorDatabase, collection: str, count: int, seed: int = DEFAULT_SEED,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE, start: int = 0, in_flight: int = 2) -> int:
+    """Bulk insert documents start..count-1 of a collection; returns how many were new.
+
+    Up to ``in_flight`` insert_many calls run while the next chunk is built,
+    so generation overlaps with the round trips.
+    """
+    pending = set()
+    inserted = 0
+    started = time.perf_counter()
+    for n, chunk in enumerate(chunks(collection, count, seed, chunk_size, start), start=1):
+        if len(pending) >= in_flight:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            inserted += sum(task.result() for task in done)
+        pending.add(asyncio.ensure_future(_insert(db[collection], chunk)))
+        if n % 100 == 0:
+            logger.info(f"{collection}: {min(start + n * chunk_size, count)}/{count} generated")
+    if pending:
+        inserted += sum(await asyncio.gather(*pending))
+    elapsed = time.perf_counter() - started
+    logger.info(f"{collection}: {inserted} inserted in {elapsed:.1f}s ({(count - start) / max(elapsed, 1e-9):.0f} docs/s)")
+    return inserted
+
+
+async def generate(db: AsyncIOMotorDatabase, counts: Dict[str, int], seed: int = DEFAULT_SEED,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """Write every collection of ``counts``; returns the new documents per collection"""
+    # Running servers drop their caches on the version bump
+    from versioning import bump_version
+
+    inserted = {}
+    for collection, count in counts.items():
+        # The unique id index (as in the registry) is what makes a re-run skip
+        # existing documents; the others are cheaper to build afterwards
+        await db[collection].create_index("id", unique=True, name="id_unique")
+        inserted[collection] = await write_collection(db, collection, count, seed, chunk_size)
+        await bump_version(db, collection)
+    return inserted
+
+
+def split_total(total: int, mix: Dict[str, float] = None) -> Dict[str, int]:
+    """Per-collection counts adding up to ``total``"""
+    mix = mix or DEFAULT_MIX
+    counts = {name: int(total * share) for name, share in mix.items()}
+    counts["providers"] += total - sum(counts.values())
+    return counts
+
+
+async def _main(argv: List[str] = None):
+    """Fill a database with a synthetic catalog"""
+    import argparse
+    import json
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from indexes import ensure_indexes
+
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic TradingHub catalog")
+    parser.add_argument("--total", type=int, default=100_000,
+                        help="Documents across all collections, split 40/5/25/30 (providers/brokers/testimonials/users)")
+    for collection in GENERATORS:
+        parser.add_argument(f"--{collection}", type=int, default=None, help=f"Number of {collection} (overrides --total)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Documents per insert_many")
+    parser.add_argument("--drop", action="store_true", help="Drop the generated collections first")
+    parser.add_argument("--no-indexes", action="store_true", help="Skip building the registry indexes afterwards")
+    args = parser.parse_args(argv)
+
+    counts = split_total(args.total)
+    for collection in GENERATORS:
+        if getattr(args, collection) is not None:
+            counts[collection] = getattr(args, collection)
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL'))
+    db = client[os.environ.get('DB_NAME', 'tradinghub')]
+
+    try:
+        if args.drop:
+            for collection in counts:
+                await db.drop_collection(collection)
+        inserted = await generate(db, counts, args.seed, args.chunk_size)
+        # Indexes are built once the data is in, which is faster than
+        # maintaining them during the bulk load
+        if not args.no_indexes:
+            await ensure_indexes(db)
+        print(json.dumps({"seed": args.seed, "requested": counts, "inserted": inserted}, indent=2))
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(asyncio.run(_main()))
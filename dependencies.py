@@ -0,0 +1,13 @@
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from auth import EmergentAuth
+
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    """Database handle of this worker, connected by the app lifespan"""
+    return request.app.state.db
+
+
+def get_auth(request: Request) -> EmergentAuth:
+    """EmergentAuth service of this worker, created by the app lifespan"""
+    return request.app.state.auth
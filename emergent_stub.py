@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Emergent session-data endpoint
+Lets login (/api/auth/session) be exercised and load tested without the real
+service. Every X-Session-ID maps to a deterministic user.
+
+Usage:
+    uvicorn emergent_stub:app --port 8002
+    EMERGENT_SESSION_URL=http://localhost:8002/auth/v1/env/oauth/session-data uvicorn server:app
+
+Environment:
+    STUB_LATENCY_MS   artificial delay per request (default 0)
+    STUB_USERS        number of distinct users session ids map onto (default 0 = one per session id)
+"""
+
+from fastapi import FastAPI, Header, HTTPException
+import asyncio
+import hashlib
+import os
+
+app = FastAPI(title="Emergent Auth stub")
+
+STUB_LATENCY_MS = float(os.environ.get('STUB_LATENCY_MS', '0'))
+STUB_USERS = int(os.environ.get('STUB_USERS', '0'))
+
+
+@app.get("/auth/v1/env/oauth/session-data")
+async def session_data(x_session_id: str = Header(None)):
+    """Return session data for a session id; ids starting with "invalid" are rejected"""
+    if not x_session_id or x_session_id.startswith("invalid"):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if STUB_LATENCY_MS:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    
+    user_key = x_session_id
+    if STUB_USERS:
+        user_key = str(int(hashlib.sha1(x_session_id.encode()).hexdigest(), 16) % STUB_USERS)
+    user_hash = hashlib.sha1(user_key.encode()).hexdigest()[:12]
+    
+    return {
+        "id": f"stub-{user_hash}",
+        "email": f"user-{user_hash}@stub.local",
+        "name": f"Stub User {user_hash}",
+        "picture": None,
+        "session_token": hashlib.sha256(x_session_id.encode()).hexdigest()
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get('STUB_PORT', '8002')))
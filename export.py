@@ -0,0 +1,84 @@
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Any, AsyncIterator, Dict, List, Type
+from datetime import datetime
+import csv
+import io
+import json
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Separator for list fields (signalTypes, regulation, ...) in CSV cells
+CSV_LIST_SEPARATOR = "|"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _ndjson_chunks(db_cursor, batch_size: int) -> AsyncIterator[bytes]:
+    lines: List[str] = []
+    async for doc in db_cursor:
+        lines.append(json.dumps(doc, default=_json_default, ensure_ascii=False))
+        if len(lines) >= batch_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def _csv_chunks(db_cursor, columns: List[str], batch_size: int) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = 0
+    async for doc in db_cursor:
+        writer.writerow([_csv_cell(doc.get(column)) for column in columns])
+        rows += 1
+        if rows >= batch_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(collection, model: Type[BaseModel], fmt: str, batch_size: int,
+                    filter_query: Dict[str, Any] = None) -> StreamingResponse:
+    """Stream a collection straight from a Motor cursor as NDJSON or CSV.
+
+    Documents are pulled one cursor batch at a time and each batch is written
+    as one chunk. StreamingResponse awaits every send, so a slow client stops
+    the cursor from being advanced instead of buffering the collection.
+    """
+    columns = ["id"] + [field for field in model.model_fields if field != "id"]
+    projection = {"_id": 0, **{column: 1 for column in columns}}
+    db_cursor = collection.find(filter_query or {}, projection).sort("id", 1).batch_size(batch_size)
+
+    if fmt == "csv":
+        body = _csv_chunks(db_cursor, columns, batch_size)
+    else:
+        body = _ndjson_chunks(db_cursor, batch_size)
+
+    filename = f"{collection.name}.{fmt}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
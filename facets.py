@@ -0,0 +1,89 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def merge_clauses(clauses: Dict[str, Dict[str, Any]], exclude: Optional[str] = None) -> Dict[str, Any]:
+    """Combine per-dimension filter clauses into one query, optionally leaving one out"""
+    query: Dict[str, Any] = {}
+    for name, clause in clauses.items():
+        if name != exclude:
+            query.update(clause)
+    return query
+
+
+class ValueFacet:
+    """Count documents per distinct value of a field (array fields are unwound)"""
+
+    def __init__(self, field: str, unwind: bool = False, lower: bool = False):
+        self.field = field
+        self.unwind = unwind
+        self.lower = lower
+
+    def stages(self) -> List[Dict[str, Any]]:
+        key: Any = f"${self.field}"
+        if self.lower:
+            key = {"$toLower": key}
+        stages = [{"$unwind": f"${self.field}"}] if self.unwind else []
+        return stages + [
+            {"$group": {"_id": key, "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ]
+
+    def counts(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{"value": str(row["_id"]), "count": row["count"]} for row in rows if row["_id"] is not None]
+
+
+class RangeFacet:
+    """Count documents per named (min, max) range of a numeric field.
+
+    Ranges are inclusive at both ends and may overlap (e.g. "up to $250" also
+    covers "up to $100"), so each one is summed separately instead of $bucket.
+    """
+
+    def __init__(self, field: str, ranges: Dict[str, Tuple[Optional[float], Optional[float]]]):
+        self.field = field
+        self.ranges = ranges
+
+    def stages(self) -> List[Dict[str, Any]]:
+        sums = {}
+        for position, (low, high) in enumerate(self.ranges.values()):
+            conditions = []
+            if low is not None:
+                conditions.append({"$gte": [f"${self.field}", low]})
+            if high is not None:
+                conditions.append({"$lte": [f"${self.field}", high]})
+            sums[f"r{position}"] = {"$sum": {"$cond": [{"$and": conditions}, 1, 0]}}
+        return [{"$group": {"_id": None, **sums}}]
+
+    def counts(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        row = rows[0] if rows else {}
+        return [
+            {"value": value, "count": row.get(f"r{position}", 0)}
+            for position, value in enumerate(self.ranges)
+        ]
+
+
+async def facet_counts(collection, clauses: Dict[str, Dict[str, Any]],
+                       facets: Dict[str, Any]) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+    """Per-value counts for every facet plus the total, in one $facet aggregation.
+
+    ``clauses`` maps each filter dimension to its query fragment. Each facet is
+    counted with every filter applied except its own, so the counts show what
+    selecting another value of that dimension would return. Clauses that are
+    not facets (e.g. search) are matched once before the $facet stage.
+    """
+    shared = {name: clause for name, clause in clauses.items() if name not in facets}
+    faceted = {name: clause for name, clause in clauses.items() if name in facets}
+
+    branches = {
+        name: [{"$match": merge_clauses(faceted, exclude=name)}] + facet.stages()
+        for name, facet in facets.items()
+    }
+    branches["total"] = [{"$match": merge_clauses(faceted)}, {"$count": "count"}]
+
+    pipeline = [{"$match": merge_clauses(shared)}, {"$facet": branches}]
+    results = await collection.aggregate(pipeline).to_list(1)
+    result = results[0] if results else {}
+
+    counts = {name: facet.counts(result.get(name, [])) for name, facet in facets.items()}
+    total_rows = result.get("total", [])
+    return counts, total_rows[0]["count"] if total_rows else 0
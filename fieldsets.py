@@ -0,0 +1,52 @@
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, List, Optional, Type
+from responses import json_response
+
+# Predefined sparse views (id is always included)
+VIEWS = {
+    "providers": {
+        "card": ["name", "rating", "winRate", "subscriptionPrice", "currency", "affiliateUrl"],
+    },
+    "brokers": {
+        "card": ["name", "rating", "minDeposit", "maxLeverage", "spreadsFrom", "currency", "affiliateUrl"],
+    },
+}
+
+
+def resolve_fields(collection: str, model: Type[BaseModel], view: str,
+                   fields: Optional[str]) -> Optional[List[str]]:
+    """Fields to return for ``view``/``fields``, or None for the full document.
+
+    An explicit ``fields`` list wins over ``view``.
+    """
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in model.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    elif view != "full":
+        requested = VIEWS.get(collection, {}).get(view)
+        if requested is None:
+            raise HTTPException(status_code=400, detail=f"Unknown view: {view}")
+    else:
+        return None
+
+    return ["id"] + [field for field in requested if field != "id"]
+
+
+def projection_for(selected: Optional[List[str]], extra: Iterable[str] = ()) -> Dict[str, Any]:
+    """Mongo projection for the selected fields (plus ``extra``, e.g. the sort key)"""
+    if selected is None:
+        return {"_id": 0}
+    return {"_id": 0, **{field: 1 for field in [*selected, *extra]}}
+
+
+def trim(doc: Dict[str, Any], selected: List[str]) -> Dict[str, Any]:
+    return {field: doc[field] for field in selected if field in doc}
+
+
+def sparse_response(**payload: Any) -> Response:
+    """Lean response for sparse fieldsets; skips the full response model"""
+    return json_response({"success": True, **payload})
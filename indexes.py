@@ -0,0 +1,209 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import IndexModel, ASCENDING, TEXT
+from pymongo.errors import OperationFailure
+from typing import Dict, List, Any
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection -> list of index specs.
+# Every spec has a stable name so drift can be detected by name.
+INDEX_REGISTRY: Dict[str, List[Dict[str, Any]]] = {
+    "providers": [
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True},
+        {"name": "signalTypes", "keys": [("signalTypes", ASCENDING)]},
+        {"name": "subscriptionPrice", "keys": [("subscriptionPrice", ASCENDING)]},
+        # Keyset pagination: (sortField, id)
+        {"name": "createdAt_id", "keys": [("createdAt", ASCENDING), ("id", ASCENDING)]},
+        {"name": "rating_id", "keys": [("rating", ASCENDING), ("id", ASCENDING)]},
+        {"name": "winRate_id", "keys": [("winRate", ASCENDING), ("id", ASCENDING)]},
+        {"name": "subscriptionPrice_id", "keys": [("subscriptionPrice", ASCENDING), ("id", ASCENDING)]},
+        # Incremental suggest index refresh when polling for invalidation
+        {"name": "updatedAt", "keys": [("updatedAt", ASCENDING)]},
+        # Relevance-ranked search; the catalog copy is written in Portuguese,
+        # so stemming and stop words follow it
+        {
+            "name": "search_text",
+            "keys": [("name", TEXT), ("signalTypes", TEXT), ("description", TEXT)],
+            "weights": {"name": 10, "signalTypes": 5, "description": 1},
+            "default_language": "portuguese",
+        },
+    ],
+    "brokers": [
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True},
+        {"name": "instruments", "keys": [("instruments", ASCENDING)]},
+        {"name": "minDeposit", "keys": [("minDeposit", ASCENDING)]},
+        {"name": "regulation", "keys": [("regulation", ASCENDING)]},
+        # Keyset pagination: (sortField, id)
+        {"name": "createdAt_id", "keys": [("createdAt", ASCENDING), ("id", ASCENDING)]},
+        {"name": "rating_id", "keys": [("rating", ASCENDING), ("id", ASCENDING)]},
+        {"name": "minDeposit_id", "keys": [("minDeposit", ASCENDING), ("id", ASCENDING)]},
+        {"name": "spreadsFrom_id", "keys": [("spreadsFrom", ASCENDING), ("id", ASCENDING)]},
+        # Incremental suggest index refresh when polling for invalidation
+        {"name": "updatedAt", "keys": [("updatedAt", ASCENDING)]},
+        # Relevance-ranked search; the catalog copy is written in Portuguese,
+        # so stemming and stop words follow it
+        {
+            "name": "search_text",
+            "keys": [("name", TEXT), ("instruments", TEXT), ("regulation", TEXT)],
+            "weights": {"name": 10, "instruments": 5, "regulation": 1},
+            "default_language": "portuguese",
+        },
+    ],
+    "testimonials": [
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True},
+        {"name": "approved", "keys": [("approved", ASCENDING)]},
+        # Keyset pagination: (approved, sortField, id)
+        {"name": "approved_createdAt_id", "keys": [("approved", ASCENDING), ("createdAt", ASCENDING), ("id", ASCENDING)]},
+        {"name": "approved_rating_id", "keys": [("approved", ASCENDING), ("rating", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "users": [
+        {"name": "id_unique", "keys": [("id", ASCENDING)], "unique": True},
+        {"name": "email_unique", "keys": [("email", ASCENDING)], "unique": True},
+        {
+            "name": "session_token_expires",
+            "keys": [("session_token", ASCENDING), ("session_expires", ASCENDING)],
+            "sparse": True,
+        },
+    ],
+}
+
+# Index options that take part in drift comparison
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "weights", "default_language")
+
+# What the server reports for a text index created without default_language
+SERVER_TEXT_LANGUAGE = "english"
+
+
+def _normalize_keys(keys: List[Any]) -> List[Any]:
+    # The server reports text indexes as _fts/_ftsx; fields live in "weights"
+    if any(direction == TEXT for _, direction in keys):
+        return [("_fts", TEXT), ("_ftsx", 1)]
+    return [(field, direction) for field, direction in keys]
+
+
+def _normalize_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a registry spec into a comparable shape"""
+    normalized = {"keys": _normalize_keys(spec["keys"])}
+    for option in COMPARED_OPTIONS:
+        if spec.get(option):
+            normalized[option] = spec[option]
+    if any(direction == TEXT for _, direction in spec["keys"]):
+        # The server reports a language for every text index
+        normalized.setdefault("default_language", SERVER_TEXT_LANGUAGE)
+    return normalized
+
+
+def _normalize_existing(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize an entry from index_information() into a comparable shape"""
+    normalized = {"keys": [(field, direction) for field, direction in info["key"]]}
+    for option in COMPARED_OPTIONS:
+        if info.get(option):
+            normalized[option] = dict(info[option]) if option == "weights" else info[option]
+    return normalized
+
+
+def _to_index_model(spec: Dict[str, Any]) -> IndexModel:
+    """Build a pymongo IndexModel from a registry spec"""
+    options = {key: value for key, value in spec.items() if key != "keys"}
+    return IndexModel(spec["keys"], **options)
+
+
+async def check_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, List[str]]]:
+    """Compare the registry against the live database and report drift"""
+    report = {}
+    # One index_information round trip per collection, all in flight at once
+    infos = await asyncio.gather(*(db[name].index_information() for name in INDEX_REGISTRY))
+    for (collection_name, specs), existing in zip(INDEX_REGISTRY.items(), infos):
+        existing.pop("_id_", None)
+
+        wanted = {spec["name"]: spec for spec in specs}
+        missing = [name for name in wanted if name not in existing]
+        mismatched = [
+            name for name in wanted
+            if name in existing and _normalize_existing(existing[name]) != _normalize_spec(wanted[name])
+        ]
+        extra = [name for name in existing if name not in wanted]
+
+        report[collection_name] = {
+            "missing": missing,
+            "mismatched": mismatched,
+            "extra": extra,
+        }
+    return report
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, prune: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Reconcile the live database with the registry.
+
+    Missing indexes are created. Mismatched indexes are rebuilt and indexes not
+    in the registry are dropped only when ``prune`` is set; otherwise they are
+    reported as drift and left untouched.
+    """
+    report = await check_indexes(db)
+
+    for collection_name, drift in report.items():
+        collection = db[collection_name]
+        specs = {spec["name"]: spec for spec in INDEX_REGISTRY[collection_name]}
+        to_create = list(drift["missing"])
+
+        if prune:
+            for name in drift["mismatched"] + drift["extra"]:
+                await collection.drop_index(name)
+                logger.info(f"Dropped index {collection_name}.{name}")
+            to_create += drift["mismatched"]
+        else:
+            for name in drift["mismatched"]:
+                logger.warning(f"Index drift on {collection_name}.{name}: definition differs from registry")
+            for name in drift["extra"]:
+                logger.warning(f"Index drift on {collection_name}.{name}: not in registry")
+
+        if not to_create:
+            continue
+
+        try:
+            await collection.create_indexes([_to_index_model(specs[name]) for name in to_create])
+            logger.info(f"Created indexes on {collection_name}: {', '.join(to_create)}")
+        except OperationFailure as e:
+            logger.error(f"Error creating indexes on {collection_name}: {str(e)}")
+
+    return report
+
+
+async def _main(argv: List[str] = None):
+    """Build or check indexes ahead of a deploy"""
+    import argparse
+    import json
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with the registry")
+    parser.add_argument("--check", action="store_true", help="Only report drift, do not build anything")
+    parser.add_argument("--prune", action="store_true", help="Rebuild mismatched and drop unregistered indexes")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL'))
+    db = client[os.environ.get('DB_NAME', 'tradinghub')]
+
+    try:
+        if args.check:
+            report = await check_indexes(db)
+        else:
+            report = await ensure_indexes(db, prune=args.prune)
+        print(json.dumps(report, indent=2))
+        return 1 if args.check and any(any(drift.values()) for drift in report.values()) else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(asyncio.run(_main()))
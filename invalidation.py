@@ -0,0 +1,281 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+from typing import Any, Dict, Optional
+import asyncio
+import os
+import logging
+
+from auth import session_cache
+from cache import get_cache
+from models import User
+from typeahead import suggest_index, INDEXED_FIELDS
+from versioning import VERSION_COLLECTION, record_version
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ["providers", "brokers", "testimonials", "users"]
+
+# Server error codes meaning change streams are unavailable on this deployment
+_CHANGE_STREAMS_UNSUPPORTED = {40573}
+# ... or that the resume token fell off the oplog
+_HISTORY_LOST = {136, 280, 286}
+
+# Seconds to wait before reopening a failed change stream
+RETRY_DELAY = 1.0
+
+
+class _ChangeStreamsUnsupported(Exception):
+    pass
+
+
+def _session_fields(user: User) -> Dict[str, Any]:
+    # createdAt defaults to now() when a document lacks it
+    return user.model_dump(exclude={"createdAt"})
+
+
+class CacheInvalidator:
+    """Background task applying writes from other workers to the local caches.
+
+    Each worker keeps its own response caches, session cache and suggest
+    index. Writes made through the worker clear them directly; this applies
+    the writes made anywhere else (another worker, a script, the mongo shell).
+
+    On a replica set it tails one change stream over the watched collections.
+    A standalone mongod has no change streams, so it falls back to polling the
+    collection_versions documents that every write bumps (see versioning.py).
+    Polling only tells which collection changed: its response cache is
+    cleared, the suggest index re-reads the documents updated since, and
+    cached sessions are checked against their user documents.
+
+    Modes (CACHE_INVALIDATION): auto (change streams, else polling),
+    changestream, poll, or off.
+    """
+
+    def __init__(self, mode: Optional[str] = None, poll_interval: Optional[float] = None):
+        # Explicit settings; the rest are read from the environment by start()
+        self._mode_override = mode
+        self._poll_interval_override = poll_interval
+        self.mode: Optional[str] = mode
+        self.poll_interval: Optional[float] = poll_interval
+        self.active_mode: Optional[str] = None
+        self.events = 0
+        self.invalidations = 0
+        self._resume_token: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start tailing in the background (app startup)"""
+        self.mode = self._mode_override or os.environ.get('CACHE_INVALIDATION', 'auto').lower()
+        self.poll_interval = self._poll_interval_override or float(os.environ.get('CACHE_POLL_INTERVAL_SECONDS', '1'))
+        if self.mode == "off" or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        """Stop the background task (app shutdown)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.active_mode = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "activeMode": self.active_mode,
+            "events": self.events,
+            "invalidations": self.invalidations,
+        }
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        try:
+            if self.mode in ("auto", "changestream"):
+                try:
+                    await self._watch(db)
+                    return
+                except _ChangeStreamsUnsupported:
+                    if self.mode == "changestream":
+                        logger.error("Change streams are not supported by this deployment; cache invalidation disabled")
+                        return
+                    logger.info("Change streams unavailable (standalone mongod?); polling collection versions")
+            await self._poll(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache invalidation stopped: {str(e)}")
+            self.active_mode = None
+
+    async def _watch(self, db: AsyncIOMotorDatabase):
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": {"$in": WATCHED_COLLECTIONS}},
+            # Versions of other workers' writes, for the ETags (see versioning.py)
+            {"ns.coll": VERSION_COLLECTION},
+            # Database-wide events carry no ns.coll
+            {"operationType": {"$in": ["invalidate", "dropDatabase"]}},
+        ]}}]
+        while True:
+            try:
+                async with db.watch(pipeline, full_document="updateLookup",
+                                    resume_after=self._resume_token) as stream:
+                    if self.active_mode != "changestream":
+                        logger.info("Tailing change streams for cache invalidation")
+                    self.active_mode = "changestream"
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        await self._apply(db, change)
+            except NotImplementedError:
+                raise _ChangeStreamsUnsupported()
+            except OperationFailure as e:
+                if e.code in _CHANGE_STREAMS_UNSUPPORTED:
+                    raise _ChangeStreamsUnsupported()
+                if e.code in _HISTORY_LOST:
+                    # Events were missed; start from now with everything dropped
+                    logger.warning(f"Change stream history lost, invalidating all caches: {str(e)}")
+                    self._resume_token = None
+                    await self._invalidate_all(db)
+                else:
+                    logger.warning(f"Change stream failed, reopening: {str(e)}")
+            except PyMongoError as e:
+                logger.warning(f"Change stream interrupted, resuming: {str(e)}")
+            await asyncio.sleep(RETRY_DELAY)
+
+    async def _apply(self, db: AsyncIOMotorDatabase, change: Dict[str, Any]):
+        """Invalidate whatever one change event affects"""
+        self.events += 1
+        operation = change["operationType"]
+        name = change.get("ns", {}).get("coll")
+
+        if operation == "invalidate" or operation == "dropDatabase":
+            # The stream closes after these; reopen from now
+            self._resume_token = None
+            await self._invalidate_all(db)
+            return
+        if name == VERSION_COLLECTION:
+            doc = change.get("fullDocument")
+            if doc and "version" in doc and "lastModified" in doc:
+                record_version(doc["_id"], doc["version"], doc["lastModified"])
+            return
+        if name not in WATCHED_COLLECTIONS:
+            return
+        if operation in ("drop", "rename"):
+            await self._invalidate_collection(db, name)
+            return
+
+        self.invalidations += 1
+        doc = change.get("fullDocument")
+
+        if name == "users":
+            if doc:
+                session_cache.discard(lambda token, user: user.id == doc.get("id") or user.email == doc.get("email"))
+            else:
+                # Deletes only carry the _id
+                await self._revalidate_sessions(db)
+            return
+
+        get_cache(name).clear()
+        if name in INDEXED_FIELDS:
+            if doc:
+                suggest_index.upsert(name, doc)
+            elif not suggest_index.remove_by_object_id(name, change.get("documentKey", {}).get("_id")):
+                # Deletes only carry the _id; re-read if it was never indexed
+                await suggest_index.resync(db, name)
+
+    async def _poll(self, db: AsyncIOMotorDatabase):
+        self.active_mode = "poll"
+        seen: Optional[Dict[str, int]] = None
+        while True:
+            try:
+                docs = await db[VERSION_COLLECTION].find({"_id": {"$in": WATCHED_COLLECTIONS}}).to_list(None)
+                versions = {doc["_id"]: doc.get("version") for doc in docs}
+                if seen is not None:
+                    for name in WATCHED_COLLECTIONS:
+                        if versions.get(name) != seen.get(name):
+                            self.events += 1
+                            await self._invalidate_collection(db, name)
+                # Only once the caches are cleared, so a new ETag never
+                # labels a stale body
+                for doc in docs:
+                    if "version" in doc and "lastModified" in doc:
+                        record_version(doc["_id"], doc["version"], doc["lastModified"])
+                seen = versions
+            except PyMongoError as e:
+                logger.warning(f"Error polling collection versions: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _invalidate_collection(self, db: AsyncIOMotorDatabase, name: str):
+        """Apply writes to ``name`` whose documents are unknown (polling, drops,
+        lost change stream history)"""
+        self.invalidations += 1
+        if name == "users":
+            await self._revalidate_sessions(db)
+            return
+        get_cache(name).clear()
+        await suggest_index.catch_up(db, name)
+
+    async def _revalidate_sessions(self, db: AsyncIOMotorDatabase):
+        """Drop the cached sessions whose user document changed (logged in or
+        out elsewhere, is_admin edited, deleted); the others stay cached"""
+        cached = session_cache.items()
+        if not cached:
+            return
+        current = {}
+        async for doc in db.users.find({"id": {"$in": list({user.id for _, user in cached})}}):
+            current[doc["id"]] = _session_fields(User(**doc))
+        stale = {token for token, user in cached if current.get(user.id) != _session_fields(user)}
+        if stale:
+            session_cache.discard(lambda token, user: token in stale)
+
+    async def _invalidate_all(self, db: AsyncIOMotorDatabase):
+        for name in WATCHED_COLLECTIONS:
+            await self._invalidate_collection(db, name)
+
+
+# Started and stopped by the app lifespan
+cache_invalidator = CacheInvalidator()
+
+
+async def _main():
+    """Print invalidation counters while writes are made from elsewhere.
+
+    Against a local single-node replica set:
+
+        mongod --replSet rs0 --dbpath /tmp/rs0 --port 27017
+        mongosh --eval 'rs.initiate()'
+        MONGO_URL='mongodb://localhost:27017/?replicaSet=rs0' python invalidation.py
+    """
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL'))
+    db = client[os.environ.get('DB_NAME', 'tradinghub')]
+
+    invalidator = CacheInvalidator()
+    invalidator.start(db)
+    try:
+        last = None
+        while True:
+            stats = invalidator.stats()
+            if stats != last:
+                print(stats, flush=True)
+                last = stats
+            await asyncio.sleep(0.5)
+    finally:
+        await invalidator.stop()
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
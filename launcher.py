@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+TradingHub production launcher
+Runs uvicorn with several worker processes. Each worker imports ``server:app``
+on its own and builds its Mongo client and auth service in the app lifespan,
+so nothing connected is ever shared across a fork.
+
+Usage:
+    python launcher.py --workers 4
+    WEB_CONCURRENCY=4 PORT=8001 python launcher.py
+
+uvloop and httptools are used when installed (``auto``), falling back to
+asyncio and h11.
+"""
+from typing import List
+import argparse
+import importlib.util
+import os
+import sys
+
+import uvicorn
+
+APP = "server:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _default_workers() -> int:
+    if os.environ.get('WEB_CONCURRENCY'):
+        return int(os.environ['WEB_CONCURRENCY'])
+    return os.cpu_count() or 1
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the TradingHub API with multiple uvicorn workers")
+    parser.add_argument("--host", default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT', '8001')))
+    parser.add_argument("--workers", type=int, default=_default_workers(),
+                        help="Worker processes (default: WEB_CONCURRENCY or the CPU count)")
+    parser.add_argument("--loop", choices=["auto", "uvloop", "asyncio"], default=os.environ.get('UVICORN_LOOP', 'auto'))
+    parser.add_argument("--http", choices=["auto", "httptools", "h11"], default=os.environ.get('UVICORN_HTTP', 'auto'))
+    parser.add_argument("--backlog", type=int, default=int(os.environ.get('UVICORN_BACKLOG', '2048')),
+                        help="Pending connections queued by the listening socket")
+    parser.add_argument("--keep-alive", type=int, default=int(os.environ.get('UVICORN_KEEP_ALIVE', '5')),
+                        help="Seconds an idle keep-alive connection is held open")
+    parser.add_argument("--limit-concurrency", type=int, default=None,
+                        help="Answer 503 above this many concurrent connections per worker")
+    parser.add_argument("--log-level", default=os.environ.get('LOG_LEVEL', 'info'))
+    parser.add_argument("--no-access-log", action="store_true", help="Disable per-request access logging")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    args = parse_args(argv)
+
+    loop = args.loop
+    if loop == "uvloop" and not _installed("uvloop"):
+        print("uvloop is not installed; using asyncio", file=sys.stderr)
+        loop = "asyncio"
+    http = args.http
+    if http == "httptools" and not _installed("httptools"):
+        print("httptools is not installed; using h11", file=sys.stderr)
+        http = "h11"
+
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        log_level=args.log_level,
+        access_log=not args.no_access_log,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
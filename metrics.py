@@ -0,0 +1,277 @@
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import bisect
+import threading
+import time
+
+
+class LatencyRecorder:
+    """Call counts, error counts and recent latency percentiles for one operation"""
+
+    def __init__(self, name: str, window: int = 1024):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self._samples = deque(maxlen=window)
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.total_seconds += seconds
+        self._samples.append(seconds)
+        OPERATION_DURATION.observe((self.name,), seconds)
+        if error:
+            self.errors += 1
+            OPERATION_ERRORS.inc((self.name,))
+
+    def time(self):
+        """Context manager recording the duration of the enclosed block"""
+        return _Timer(self)
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self._samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class _Timer:
+    def __init__(self, recorder: LatencyRecorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.observe(time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+# All latency recorders by name, for monitoring
+recorders: Dict[str, LatencyRecorder] = {}
+
+
+def get_recorder(name: str) -> LatencyRecorder:
+    """Get or create the named latency recorder"""
+    if name not in recorders:
+        recorders[name] = LatencyRecorder(name)
+    return recorders[name]
+
+
+def latency_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: recorder.stats() for name, recorder in recorders.items()}
+
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow upstreams
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values.
+
+    ``observe`` is a bisect plus a few additions under a lock (observations
+    also arrive from PyMongo's monitoring threads).
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: Tuple[Any, ...], seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        lines = []
+        for label_values, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[Any, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: Tuple[Any, ...] = (), amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (e.g. requests in flight)"""
+
+    type = "gauge"
+
+    def dec(self, label_values: Tuple[Any, ...] = (), amount: float = 1):
+        self.inc(label_values, -amount)
+
+
+class Collector:
+    """Metric whose samples are computed at scrape time by ``collect``, which
+    returns {label values: value}; for state kept elsewhere (caches, pool)"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...],
+                 collect: Callable[[], Dict[Tuple[Any, ...], float]], type: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self.type = type
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            for labels, value in self.collect().items()
+        ]
+
+
+# Every metric exposed on /metrics, in registration order
+registry: Dict[str, Any] = {}
+
+
+def register(metric):
+    """Add a metric to the /metrics registry (idempotent by name)"""
+    return registry.setdefault(metric.name, metric)
+
+
+def render_prometheus() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in registry.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+OPERATION_DURATION = register(Histogram(
+    "operation_duration_seconds",
+    "Duration of instrumented operations such as upstream calls",
+    ("operation",)
+))
+OPERATION_ERRORS = register(Counter(
+    "operation_errors_total",
+    "Instrumented operations that raised",
+    ("operation",)
+))
+HTTP_DURATION = register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status",
+    ("method", "route", "status")
+))
+HTTP_IN_FLIGHT = register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served by this worker"
+))
+
+
+# ASGI scope of the request being served, for code that runs below the
+# handler (e.g. Mongo command listeners) and wants to know the route
+request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_scope", default=None)
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Route path template ("/api/providers/{provider_id}") rather than the
+    raw path, to keep label cardinality bounded"""
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        # Answered before routing (e.g. a 304 from ConditionalGetMiddleware)
+        from starlette.routing import Match
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        token = request_scope.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_scope.reset(token)
+            HTTP_IN_FLIGHT.dec()
+            HTTP_DURATION.observe((scope["method"], route_template(scope), status), time.perf_counter() - start)
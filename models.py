@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 from datetime import datetime, timezone
 
@@ -139,7 +139,8 @@ class ProviderResponse(BaseModel):
 class ProviderListResponse(BaseModel):
     success: bool
     data: List[Provider] = []
-    total: int = 0
+    total: Optional[int] = 0
+    nextCursor: Optional[str] = None
     message: Optional[str] = None
 
 class BrokerResponse(BaseModel):
@@ -150,7 +151,8 @@ class BrokerResponse(BaseModel):
 class BrokerListResponse(BaseModel):
     success: bool
     data: List[Broker] = []
-    total: int = 0
+    total: Optional[int] = 0
+    nextCursor: Optional[str] = None
     message: Optional[str] = None
 
 class TestimonialResponse(BaseModel):
@@ -161,5 +163,16 @@ class TestimonialResponse(BaseModel):
 class TestimonialListResponse(BaseModel):
     success: bool
     data: List[Testimonial] = []
+    total: Optional[int] = 0
+    nextCursor: Optional[str] = None
+    message: Optional[str] = None
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+class FacetsResponse(BaseModel):
+    success: bool
+    facets: Dict[str, List[FacetValue]] = {}
     total: int = 0
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
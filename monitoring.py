@@ -0,0 +1,129 @@
+from pymongo import monitoring
+from typing import Any, Dict, Tuple
+import threading
+
+from metrics import Collector, Counter, Histogram, register
+
+MONGO_COMMAND_DURATION = register(Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command round trips by collection and command",
+    ("collection", "command")
+))
+MONGO_COMMAND_FAILURES = register(Counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error",
+    ("collection", "command")
+))
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters fed by PyMongo's CMAP events.
+
+    Callbacks arrive on driver threads, so counters are updated under a lock.
+    Totals are summed over every server the client talks to.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.check_out_failures = 0
+        self.pool_clears = 0
+
+    def _add(self, **deltas: int):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, check_out_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def stats(self, max_pool_size: int = None) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "open": self.open,
+                "checkedOut": self.checked_out,
+                "idle": max(self.open - self.checked_out, 0),
+                "waitQueue": self.waiting,
+                "checkOutFailures": self.check_out_failures,
+                "poolClears": self.pool_clears,
+            }
+        if max_pool_size is not None:
+            # Connections a request could still check out without waiting
+            stats["maxPoolSize"] = max_pool_size
+            stats["available"] = max(max_pool_size - stats["checkedOut"], 0)
+        return stats
+
+
+class CommandStats(monitoring.CommandListener):
+    """Times every command by collection and command name.
+
+    The duration comes with the succeeded/failed event; only the collection
+    name has to be carried over from the started event.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        command = event.command
+        target = command.get("collection") if event.command_name == "getMore" else command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.observe((collection, event.command_name), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.observe((collection, event.command_name), event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.inc((collection, event.command_name))
+
+
+# Registered on the Motor client of this process by Database.connect()
+pool_stats = PoolStats()
+command_stats = CommandStats()
+
+register(Collector(
+    "mongodb_pool_connections",
+    "Pooled MongoDB connections of this worker by state",
+    ("state",),
+    lambda: {("checked_out",): pool_stats.checked_out, ("idle",): max(pool_stats.open - pool_stats.checked_out, 0)}
+))
+register(Collector(
+    "mongodb_pool_wait_queue",
+    "Requests waiting to check out a MongoDB connection",
+    (),
+    lambda: {(): pool_stats.waiting}
+))
@@ -0,0 +1,154 @@
+from fastapi import HTTPException
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import base64
+import json
+
+
+# Type of the values each sort field holds, which a cursor's value must match
+# so it can only ever compare against them (never carry an operator such as
+# {"$ne": ...}). Fields not listed are numeric.
+SORT_VALUE_TYPES: Dict[str, Tuple[type, ...]] = {
+    "createdAt": (datetime,),
+    "updatedAt": (datetime,),
+    "name": (str,),
+}
+NUMERIC_TYPES = (int, float)
+
+
+def parse_sort(sort: str, allowed_fields: List[str]) -> Tuple[str, int]:
+    """Parse a sort parameter like "rating" or "-rating" into (field, direction)"""
+    direction = -1 if sort.startswith("-") else 1
+    field = sort.lstrip("-")
+    if field not in allowed_fields:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort field. Allowed: {', '.join(allowed_fields)}"
+        )
+    return field, direction
+
+
+def sort_spec(field: str, direction: int) -> List[Tuple[str, int]]:
+    """Stable sort on (field, id) so ties never reorder between pages"""
+    return [(field, direction), ("id", direction)]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(sort: str, doc: Dict[str, Any], field: str) -> str:
+    """Build an opaque cursor pointing just after ``doc``"""
+    payload = {"s": sort, "v": _encode_value(doc.get(field)), "id": doc["id"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    """Decode an opaque cursor into (last sort value, last id).
+
+    Cursors come from the client, so the value must be a scalar of the sort
+    field's type (or None, for documents missing the field) and the id a
+    string; anything else is a 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = _decode_value(payload["v"]), payload["id"]
+        cursor_sort = payload["s"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+
+    value_types = SORT_VALUE_TYPES.get(sort.lstrip("-"), NUMERIC_TYPES)
+    valid_value = value is None or (isinstance(value, value_types) and not isinstance(value, bool))
+    if not valid_value or not isinstance(last_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+
+def keyset_filter(field: str, direction: int, value: Any, last_id: str) -> Dict[str, Any]:
+    """Filter selecting documents strictly after (value, last_id) in sort order.
+
+    Documents missing ``field`` (or holding null) sort before every value, and
+    comparison operators never match across types, so null needs its own
+    clauses: ascending, every non-null value comes after it; descending, every
+    null comes after a value.
+    """
+    op = "$gt" if direction == 1 else "$lt"
+    same_value = {field: value, "id": {op: last_id}}
+    if value is None:
+        if direction == 1:
+            return {"$or": [{field: {"$ne": None}}, same_value]}
+        return same_value
+    clauses = [{field: {op: value}}, same_value]
+    if direction == -1:
+        clauses.append({field: None})
+    return {"$or": clauses}
+
+
+def apply_cursor(filter_query: Dict[str, Any], cursor: Optional[str], sort: str,
+                 field: str, direction: int) -> Dict[str, Any]:
+    """Combine a listing filter with the keyset condition for ``cursor``"""
+    if not cursor:
+        return filter_query
+    value, last_id = decode_cursor(cursor, sort)
+    after = keyset_filter(field, direction, value, last_id)
+    if not filter_query:
+        return after
+    return {"$and": [filter_query, after]}
+
+
+def next_cursor(docs: List[Dict[str, Any]], limit: int, sort: str, field: str) -> Optional[str]:
+    """Cursor for the following page, or None when this page is the last"""
+    if len(docs) < limit:
+        return None
+    return encode_cursor(sort, docs[-1], field)
+
+
+async def fetch_page(collection, filter_query: Dict[str, Any], page_query: Dict[str, Any],
+                     sort: List[Tuple[str, int]], skip: int, limit: int,
+                     total_mode: str = "exact",
+                     projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Fetch one page and its total concurrently.
+
+    ``total_mode`` is "exact" (count_documents on the filter), "estimated"
+    (collection metadata, only for unfiltered queries; filtered queries fall
+    back to an exact count) or "none" (no count, total is None).
+    """
+    db_cursor = collection.find(page_query, projection).sort(sort)
+    if skip:
+        db_cursor = db_cursor.skip(skip)
+    data_task = db_cursor.limit(limit).to_list(length=limit)
+
+    if total_mode == "none":
+        return await data_task, None
+
+    if total_mode == "estimated" and not filter_query:
+        count_task = collection.estimated_document_count()
+    else:
+        count_task = collection.count_documents(filter_query)
+
+    data, total = await asyncio.gather(data_task, count_task)
+    return data, total
+
+
+def text_score_sort() -> List[Tuple[str, Any]]:
+    """Sort by $text relevance, with id as a stable tiebreaker"""
+    return [("score", {"$meta": "textScore"}), ("id", 1)]
+
+
+def text_search(q: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Filter and projection for a $text query against the weighted text index"""
+    return {"$text": {"$search": q}}, {"score": {"$meta": "textScore"}}
@@ -1,8 +1,20 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
-from models import Provider, ProviderCreate, ProviderUpdate, ProviderListResponse, ProviderResponse
-from database import database
+from models import Provider, ProviderCreate, ProviderUpdate, ProviderListResponse, ProviderResponse, FacetsResponse
+from dependencies import get_db, get_auth
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from auth import EmergentAuth
+from cache import get_cache, cached
+from versioning import bump_version
+from typeahead import suggest_index
+from bulk import BulkImporter, run_bulk
+from export import export_response
+from facets import ValueFacet, RangeFacet, merge_clauses, facet_counts
+from fieldsets import resolve_fields, projection_for, trim, sparse_response
+from responses import model_response
+from timing import timed
+from pagination import parse_sort, sort_spec, apply_cursor, next_cursor, fetch_page, text_search, text_score_sort
+from pymongo import ReturnDocument
 from datetime import datetime, timezone
 import uuid
 import logging
@@ -11,112 +23,228 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/providers", tags=["providers"])
 
-# Initialize auth instance  
-auth = EmergentAuth(database.db)
+# Response cache for the read routes, cleared by every write below
+provider_cache = get_cache("providers")
+
+# Fields accepted by ?sort= (each backed by a (field, id) index)
+SORT_FIELDS = ["createdAt", "rating", "winRate", "subscriptionPrice"]
+
+# Price ranges offered by the priceRange filter ("150-9999" means 150+)
+PRICE_RANGES = {
+    "0-100": (0, 100),
+    "100-150": (100, 150),
+    "150-9999": (150, None),
+}
+
+# Facet counted for each filter parameter of the list route
+PROVIDER_FACETS = {
+    "signalType": ValueFacet("signalTypes", unwind=True),
+    "riskLevel": ValueFacet("riskLevel", lower=True),
+    "priceRange": RangeFacet("subscriptionPrice", PRICE_RANGES),
+}
+
+def _filter_clauses(signalType: Optional[str], riskLevel: Optional[str],
+                    priceRange: Optional[str], search: Optional[str]) -> dict:
+    """Query fragment of each applied list filter, keyed by its parameter"""
+    clauses = {}
+    
+    # Signal type filter
+    if signalType and signalType != "all":
+        clauses["signalType"] = {"signalTypes": signalType}
+    
+    # Risk level filter
+    if riskLevel and riskLevel != "all":
+        clauses["riskLevel"] = {"riskLevel": {"$regex": riskLevel, "$options": "i"}}
+    
+    # Price range filter
+    if priceRange and priceRange != "all":
+        if "-" in priceRange:
+            min_price, max_price = map(int, priceRange.split("-"))
+            if max_price == 9999:  # Handle "150+" case
+                clauses["priceRange"] = {"subscriptionPrice": {"$gte": min_price}}
+            else:
+                clauses["priceRange"] = {"subscriptionPrice": {"$gte": min_price, "$lte": max_price}}
+    
+    # Search filter
+    if search:
+        search_regex = {"$regex": search, "$options": "i"}
+        clauses["search"] = {"$or": [
+            {"name": search_regex},
+            {"signalTypes": {"$elemMatch": search_regex}}
+        ]}
+    
+    return clauses
 
 @router.get("/", response_model=ProviderListResponse)
+@cached(provider_cache)
 async def get_providers(
     signalType: Optional[str] = Query(None, description="Filter by signal type"),
     riskLevel: Optional[str] = Query(None, description="Filter by risk level"), 
     priceRange: Optional[str] = Query(None, description="Filter by price range"),
     search: Optional[str] = Query(None, description="Search in name and signal types"),
+    sort: str = Query("createdAt", description="Sort field, prefix with - for descending"),
+    cursor: Optional[str] = Query(None, description="Opaque nextCursor from the previous page (replaces skip)"),
+    total: str = Query("exact", pattern="^(exact|estimated|none)$", description="Total count mode: exact, estimated or none"),
+    view: str = Query("full", pattern="^(card|full)$", description="Predefined field set: card or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (overrides view)"),
     limit: int = Query(50, ge=1, le=100),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get all providers with optional filters"""
     try:
+        sort_field, sort_direction = parse_sort(sort, SORT_FIELDS)
+        selected = resolve_fields("providers", Provider, view, fields)
+        
         # Build filter query
-        filter_query = {}
-        
-        # Signal type filter
-        if signalType and signalType != "all":
-            filter_query["signalTypes"] = signalType
-        
-        # Risk level filter
-        if riskLevel and riskLevel != "all":
-            filter_query["riskLevel"] = {"$regex": riskLevel, "$options": "i"}
-        
-        # Price range filter
-        if priceRange and priceRange != "all":
-            if "-" in priceRange:
-                min_price, max_price = map(int, priceRange.split("-"))
-                if max_price == 9999:  # Handle "150+" case
-                    filter_query["subscriptionPrice"] = {"$gte": min_price}
-                else:
-                    filter_query["subscriptionPrice"] = {"$gte": min_price, "$lte": max_price}
-        
-        # Search filter
-        if search:
-            search_regex = {"$regex": search, "$options": "i"}
-            filter_query["$or"] = [
-                {"name": search_regex},
-                {"signalTypes": {"$elemMatch": search_regex}}
-            ]
-        
-        # Get total count
-        total = await database.db.providers.count_documents(filter_query)
-        
-        # Get providers with pagination
-        cursor = database.db.providers.find(filter_query).skip(skip).limit(limit)
-        providers_data = await cursor.to_list(length=limit)
-        
-        providers = [Provider(**provider_data) for provider_data in providers_data]
-        
-        return ProviderListResponse(
+        filter_query = merge_clauses(_filter_clauses(signalType, riskLevel, priceRange, search))
+        
+        # Get providers page and total concurrently, with keyset pagination
+        # (or legacy skip when no cursor)
+        page_query = apply_cursor(filter_query, cursor, sort, sort_field, sort_direction)
+        providers_data, total_count = await fetch_page(
+            db.providers,
+            filter_query,
+            page_query,
+            sort_spec(sort_field, sort_direction),
+            0 if cursor else skip,
+            limit,
+            total,
+            projection=projection_for(selected, [sort_field])
+        )
+        cursor_next = next_cursor(providers_data, limit, sort, sort_field)
+        
+        if selected:
+            return sparse_response(
+                data=[trim(provider_data, selected) for provider_data in providers_data],
+                total=total_count,
+                nextCursor=cursor_next
+            )
+        
+        with timed("model"):
+            providers = [Provider(**provider_data) for provider_data in providers_data]
+        
+        return model_response(ProviderListResponse(
             success=True,
             data=providers,
-            total=total
-        )
+            total=total_count,
+            nextCursor=cursor_next
+        ))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting providers: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get providers")
 
-@router.get("/search")
+@router.get("/search", response_model=ProviderListResponse)
+@cached(provider_cache)
 async def search_providers(
     q: str = Query(..., description="Search query"),
-    limit: int = Query(20, ge=1, le=50)
+    limit: int = Query(20, ge=1, le=50),
+    skip: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """Search providers by name or signal types"""
+    """Search providers by name, signal types or description, ranked by text relevance"""
     try:
-        search_regex = {"$regex": q, "$options": "i"}
-        filter_query = {
-            "$or": [
-                {"name": search_regex},
-                {"signalTypes": {"$elemMatch": search_regex}}
-            ]
-        }
+        filter_query, projection = text_search(q)
         
-        cursor = database.db.providers.find(filter_query).limit(limit)
-        providers_data = await cursor.to_list(length=limit)
+        providers_data, total = await fetch_page(
+            db.providers,
+            filter_query,
+            filter_query,
+            text_score_sort(),
+            skip,
+            limit,
+            projection=projection
+        )
         
-        providers = [Provider(**provider_data) for provider_data in providers_data]
+        with timed("model"):
+            providers = [Provider(**provider_data) for provider_data in providers_data]
         
-        return ProviderListResponse(
+        return model_response(ProviderListResponse(
             success=True,
             data=providers,
-            total=len(providers)
-        )
+            total=total
+        ))
         
     except Exception as e:
         logger.error(f"Error searching providers: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to search providers")
 
+@router.get("/facets", response_model=FacetsResponse)
+@cached(provider_cache)
+async def get_provider_facets(
+    signalType: Optional[str] = Query(None, description="Filter by signal type"),
+    riskLevel: Optional[str] = Query(None, description="Filter by risk level"), 
+    priceRange: Optional[str] = Query(None, description="Filter by price range"),
+    search: Optional[str] = Query(None, description="Search in name and signal types"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Per-value provider counts for every filter, given the other applied filters"""
+    try:
+        clauses = _filter_clauses(signalType, riskLevel, priceRange, search)
+        facets, total = await facet_counts(db.providers, clauses, PROVIDER_FACETS)
+        
+        return model_response(FacetsResponse(
+            success=True,
+            facets=facets,
+            total=total
+        ))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting provider facets: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get provider facets")
+
+@router.get("/export")
+async def export_providers(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    batchSize: int = Query(1000, ge=1, le=10000, description="Documents fetched per cursor batch"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
+):
+    """Stream every provider as NDJSON or CSV (Admin only)"""
+    try:
+        # Require admin authentication
+        await auth.require_admin(request)
+        
+        return export_response(db.providers, Provider, format, batchSize)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting providers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export providers")
+
 @router.get("/{provider_id}", response_model=ProviderResponse)
-async def get_provider(provider_id: str):
+@cached(provider_cache)
+async def get_provider(
+    provider_id: str,
+    view: str = Query("full", pattern="^(card|full)$", description="Predefined field set: card or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (overrides view)"),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Get single provider by ID"""
     try:
-        provider_data = await database.db.providers.find_one({"id": provider_id})
+        selected = resolve_fields("providers", Provider, view, fields)
+        provider_data = await db.providers.find_one({"id": provider_id}, projection_for(selected))
         
         if not provider_data:
             raise HTTPException(status_code=404, detail="Provider not found")
         
-        provider = Provider(**provider_data)
+        if selected:
+            return sparse_response(data=trim(provider_data, selected))
+        
+        with timed("model"):
+            provider = Provider(**provider_data)
         
-        return ProviderResponse(
+        return model_response(ProviderResponse(
             success=True,
             data=provider
-        )
+        ))
         
     except HTTPException:
         raise
@@ -127,7 +255,9 @@ async def get_provider(provider_id: str):
 @router.post("/", response_model=ProviderResponse)
 async def create_provider(
     provider_data: ProviderCreate,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Create new provider (Admin only)"""
     try:
@@ -143,13 +273,16 @@ async def create_provider(
         )
         
         # Insert into database
-        await database.db.providers.insert_one(new_provider.dict())
+        await db.providers.insert_one(new_provider.dict())
+        provider_cache.clear()
+        await bump_version(db, "providers")
+        suggest_index.upsert("providers", new_provider.dict())
         
-        return ProviderResponse(
+        return model_response(ProviderResponse(
             success=True,
             data=new_provider,
             message="Provider created successfully"
-        )
+        ))
         
     except HTTPException:
         raise
@@ -157,42 +290,85 @@ async def create_provider(
         logger.error(f"Error creating provider: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create provider")
 
+@router.post("/bulk")
+async def bulk_providers(
+    request: Request,
+    mode: str = Query("create", pattern="^(create|upsert|update)$", description="create, upsert (by id) or update (partial, by id)"),
+    batchSize: int = Query(1000, ge=1, le=10000, description="Records validated and written per bulk_write"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
+):
+    """Bulk create/upsert/update providers from a JSON array or NDJSON body (Admin only)"""
+    try:
+        # Require admin authentication (once for the whole import)
+        await auth.require_admin(request)
+        
+        async def on_written(ids):
+            provider_cache.clear()
+            await bump_version(db, "providers")
+            await suggest_index.refresh(db, "providers", ids)
+        
+        importer = BulkImporter(
+            db.providers,
+            mode,
+            batchSize,
+            create_model=ProviderCreate,
+            update_model=ProviderUpdate,
+            model=Provider,
+            on_written=on_written
+        )
+        
+        return await run_bulk(request, importer)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk importing providers: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to bulk import providers")
+
 @router.put("/{provider_id}", response_model=ProviderResponse)
 async def update_provider(
     provider_id: str,
     provider_update: ProviderUpdate,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Update provider (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if provider exists
-        existing_provider = await database.db.providers.find_one({"id": provider_id})
-        if not existing_provider:
-            raise HTTPException(status_code=404, detail="Provider not found")
-        
         # Prepare update data
         update_data = provider_update.dict(exclude_unset=True)
         if update_data:
             update_data["updatedAt"] = datetime.now(timezone.utc)
             
-            # Update provider
-            await database.db.providers.update_one(
+            # Update and read back in one operation
+            updated_provider_data = await db.providers.find_one_and_update(
                 {"id": provider_id},
-                {"$set": update_data}
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
             )
+        else:
+            updated_provider_data = await db.providers.find_one({"id": provider_id})
         
-        # Get updated provider
-        updated_provider_data = await database.db.providers.find_one({"id": provider_id})
-        updated_provider = Provider(**updated_provider_data)
+        if not updated_provider_data:
+            raise HTTPException(status_code=404, detail="Provider not found")
+        
+        if update_data:
+            provider_cache.clear()
+            await bump_version(db, "providers")
+        suggest_index.upsert("providers", updated_provider_data)
+        
+        with timed("model"):
+            updated_provider = Provider(**updated_provider_data)
         
-        return ProviderResponse(
+        return model_response(ProviderResponse(
             success=True,
             data=updated_provider,
             message="Provider updated successfully"
-        )
+        ))
         
     except HTTPException:
         raise
@@ -203,20 +379,22 @@ async def update_provider(
 @router.delete("/{provider_id}")
 async def delete_provider(
     provider_id: str,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Delete provider (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if provider exists
-        existing_provider = await database.db.providers.find_one({"id": provider_id})
-        if not existing_provider:
-            raise HTTPException(status_code=404, detail="Provider not found")
-        
         # Delete provider
-        await database.db.providers.delete_one({"id": provider_id})
+        result = await db.providers.delete_one({"id": provider_id})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Provider not found")
+        provider_cache.clear()
+        await bump_version(db, "providers")
+        suggest_index.remove("providers", provider_id)
         
         return {
             "success": True,
@@ -0,0 +1,45 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from typing import Any
+
+from timing import timed
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as _BaseJSONResponse
+except ImportError:
+    class _BaseJSONResponse(JSONResponse):
+        """Stdlib fallback when orjson is not installed"""
+
+        def render(self, content: Any) -> bytes:
+            return super().render(jsonable_encoder(content))
+
+
+class FastJSONResponse(_BaseJSONResponse):
+    """orjson JSON response, rendering timed as Server-Timing "serialize" """
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+def model_response(payload: BaseModel, status_code: int = 200) -> Response:
+    """Serialize an already validated response model straight to JSON.
+
+    Returning a Response makes FastAPI skip re-validating the payload against
+    the route's response_model and running jsonable_encoder over it; the
+    response_model still documents the shape in OpenAPI.
+    """
+    with timed("serialize"):
+        content = payload.model_dump_json()
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """Serialize plain dict/list content (datetimes included) with orjson"""
+    return FastJSONResponse(content=content, status_code=status_code)
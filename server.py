@@ -1,18 +1,43 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import time
 import os
 import logging
 from pathlib import Path
-
-# Import database and routes
-from database import database
-from routes import auth_routes, provider_routes, broker_routes, testimonial_routes
+from typing import Optional
 
 ROOT_DIR = Path(__file__).parent
+# Before the local imports below, which read settings at import time
 load_dotenv(ROOT_DIR / '.env')
 
+# Import database and routes
+from database import Database
+from cache import cache_stats
+from metrics import latency_stats, render_prometheus, RequestMetricsMiddleware
+from monitoring import pool_stats
+from auth import EmergentAuth, start_http_client, close_http_client
+from dependencies import get_auth
+from responses import FastJSONResponse, json_response
+from typeahead import suggest_index
+from versioning import ConditionalGetMiddleware, load_versions
+from invalidation import cache_invalidator
+from slow_commands import slow_command_monitor, recent_slow_commands
+from timing import ServerTimingMiddleware
+import auth_routes, provider_routes, broker_routes, testimonial_routes, suggest_routes
+
+# /api/ready fails when Mongo does not answer a ping within this many seconds
+READY_PING_TIMEOUT = float(os.environ.get('READY_PING_TIMEOUT_SECONDS', '0.5'))
+# ... or when more requests than this wait for a pooled connection (unset: no limit)
+READY_MAX_WAIT_QUEUE = os.environ.get('READY_MAX_WAIT_QUEUE')
+
+# Failed warm-ups are retried after this many seconds, doubling up to the max
+WARM_UP_RETRY_MIN = float(os.environ.get('WARM_UP_RETRY_MIN_SECONDS', '1'))
+WARM_UP_RETRY_MAX = float(os.environ.get('WARM_UP_RETRY_MAX_SECONDS', '30'))
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,17 +45,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def warm_up(app: FastAPI):
+    """Indexes, seeding, collection versions and the suggest index, off the
+    startup path; retried with capped backoff until it succeeds"""
+    started = time.perf_counter()
+    delay = WARM_UP_RETRY_MIN
+    while True:
+        try:
+            await app.state.database.prepare()
+            await load_versions(app.state.db)
+            await suggest_index.load(app.state.db)
+            break
+        except Exception as e:
+            logger.error(f"Error warming up, retrying in {delay:g}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARM_UP_RETRY_MAX)
+    app.state.ready = True
+    logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - startup and shutdown events"""
     # Startup
     logger.info("Starting TradingHub backend...")
+    
+    # Per-worker services: created here, after the fork, and injected into
+    # the routes through dependencies.py
+    database = Database()
     await database.connect()
+    app.state.database = database
+    app.state.db = database.db
+    app.state.auth = EmergentAuth(database.db)
+    
+    await start_http_client()
+    cache_invalidator.start(database.db)
+    slow_command_monitor.start(database.db)
+    
+    # Serve (e.g. /api/health) right away; ready flips once warm-up is done
+    app.state.ready = False
+    warm_up_task = asyncio.create_task(warm_up(app))
     
     yield
     
     # Shutdown
     logger.info("Shutting down TradingHub backend...")
+    warm_up_task.cancel()
+    try:
+        await warm_up_task
+    except asyncio.CancelledError:
+        pass
+    await cache_invalidator.stop()
+    await slow_command_monitor.stop()
+    await close_http_client()
     await database.disconnect()
 
 # Create the main app
@@ -38,7 +104,8 @@ app = FastAPI(
     title="TradingHub API",
     description="API for TradingHub marketplace",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Create a router with the /api prefix
@@ -50,11 +117,90 @@ async def root():
     return {"message": "TradingHub API is running", "version": "1.0.0"}
 
 @api_router.get("/health")
-async def health_check():
+async def health_check(request: Request):
     return {
         "status": "healthy",
         "service": "tradinghub-api",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ready": request.app.state.ready
+    }
+
+@api_router.get("/live")
+async def liveness_check():
+    """Liveness: the worker's event loop is serving requests"""
+    return {"status": "alive"}
+
+@api_router.get("/ready")
+async def readiness_check(request: Request):
+    """Readiness: warm-up done, Mongo answers a ping in time and the pool is not saturated"""
+    mongo = {"ok": False}
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(request.app.state.db.command("ping"), READY_PING_TIMEOUT)
+        mongo["ok"] = True
+    except asyncio.TimeoutError:
+        mongo["error"] = f"ping timed out after {READY_PING_TIMEOUT}s"
+    except Exception as e:
+        mongo["error"] = str(e)
+    mongo["pingMs"] = round((time.perf_counter() - started) * 1000, 2)
+    
+    pool = pool_stats.stats(request.app.state.database.client.options.pool_options.max_pool_size)
+    saturated = READY_MAX_WAIT_QUEUE is not None and pool["waitQueue"] > int(READY_MAX_WAIT_QUEUE)
+    ready = request.app.state.ready and mongo["ok"] and not saturated
+    
+    return json_response(
+        {
+            "status": "ready" if ready else "unavailable",
+            "warm": request.app.state.ready,
+            "saturated": saturated,
+            "mongo": mongo,
+            "pool": pool
+        },
+        status_code=200 if ready else 503
+    )
+
+@api_router.get("/cache/stats")
+async def get_cache_stats(request: Request, auth: EmergentAuth = Depends(get_auth)):
+    """Hit/miss/eviction counters of the in-process response caches (admin only)"""
+    await auth.require_admin(request)
+    return {
+        "success": True,
+        "caches": cache_stats(),
+        "invalidation": cache_invalidator.stats()
+    }
+
+@api_router.get("/latency/stats")
+async def get_latency_stats(request: Request, auth: EmergentAuth = Depends(get_auth)):
+    """Latency percentiles of upstream calls (admin only)"""
+    await auth.require_admin(request)
+    return {
+        "success": True,
+        "latency": latency_stats()
+    }
+
+@api_router.get("/admin/slow-commands")
+async def get_slow_commands(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    collection: Optional[str] = Query(None),
+    route: Optional[str] = Query(None, description="Route template, e.g. /api/providers/"),
+    collscan: Optional[bool] = Query(None),
+    minMs: Optional[float] = Query(None, ge=0),
+    auth: EmergentAuth = Depends(get_auth)
+):
+    """Newest entries of the slow MongoDB command log (admin only)"""
+    await auth.require_admin(request)
+    try:
+        commands = await recent_slow_commands(
+            request.app.state.db, limit, collection=collection, route=route, collscan=collscan, min_ms=minMs
+        )
+    except Exception as e:
+        logger.error(f"Error fetching slow commands: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch slow commands")
+    return {
+        "success": True,
+        "monitor": slow_command_monitor.stats(),
+        "commands": commands
     }
 
 # Include route modules
@@ -62,10 +208,19 @@ api_router.include_router(auth_routes.router)
 api_router.include_router(provider_routes.router)
 api_router.include_router(broker_routes.router)
 api_router.include_router(testimonial_routes.router)
+api_router.include_router(suggest_routes.router)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of this worker"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# ETag / Last-Modified / 304 on catalog GETs
+app.add_middleware(ConditionalGetMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -75,6 +230,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing breakdown (auth, db, model, serialize) of every response
+app.add_middleware(ServerTimingMiddleware)
+
+# Request latency / in-flight metrics (outermost, so it times everything)
+app.add_middleware(RequestMetricsMiddleware)
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    from launcher import main
+    main()
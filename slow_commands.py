@@ -0,0 +1,292 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid, PyMongoError
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import os
+import logging
+
+from metrics import Counter, register, request_scope, route_template
+
+logger = logging.getLogger(__name__)
+
+# Capped collection the slow commands of every worker are written to
+SLOW_COMMAND_COLLECTION = "slow_commands"
+
+# Commands that carry a filter or pipeline worth explaining
+MONITORED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Driver/session fields that explain() rejects inside the explained command
+_SESSION_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+# Slow commands whose explain/insert may be in flight at once; more are dropped
+MAX_PENDING = 64
+
+SLOW_COMMANDS = register(Counter(
+    "mongodb_slow_commands_total",
+    "MongoDB commands slower than SLOW_COMMAND_MS",
+    ("collection", "command")
+))
+
+
+def _threshold_ms() -> Optional[float]:
+    value = os.environ.get('SLOW_COMMAND_MS', '100')
+    return None if value.lower() == 'off' else float(value)
+
+
+def query_shape(value: Any) -> Any:
+    """Filter/pipeline with every value replaced by "?".
+
+    Operators, field names and "$field" paths are kept, so queries that only
+    differ in their values have the same shape:
+    {"signalTypes": {"$in": ["Forex"]}, "subscriptionPrice": {"$lte": 150}}
+    -> {"signalTypes": {"$in": "?"}, "subscriptionPrice": {"$lte": "?"}}
+    """
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and any(isinstance(item, (dict, list, tuple)) for item in value):
+        # $and/$or branches, pipeline stages
+        return [query_shape(item) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """Value-free summary of what a command asked for"""
+    if command_name == "find":
+        shape = {"filter": query_shape(command.get("filter", {}))}
+        if command.get("sort"):
+            shape["sort"] = dict(command["sort"])
+        return shape
+    if command_name == "aggregate":
+        return {"pipeline": query_shape(command.get("pipeline", []))}
+    if command_name in ("count", "distinct", "findAndModify"):
+        shape = {"filter": query_shape(command.get("query") or {})}
+        if command_name == "distinct":
+            shape["key"] = command.get("key")
+        return shape
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return {"filter": query_shape(statements[0].get("q", {})), "statements": len(statements)}
+    return {}
+
+
+def explain_command(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The command as explain() accepts it: no session fields, one write statement"""
+    explained = {
+        key: value for key, value in command.items()
+        if key not in _SESSION_FIELDS and not key.startswith("$")
+    }
+    if command_name == "update":
+        explained["updates"] = explained["updates"][:1]
+    elif command_name == "delete":
+        explained["deletes"] = explained["deletes"][:1]
+    return explained
+
+
+def _winning_plans(node: Any) -> Iterator[Dict[str, Any]]:
+    """Every winningPlan of an explain result (aggregations can have several)"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan":
+                yield value
+            elif key != "rejectedPlans":
+                yield from _winning_plans(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _winning_plans(item)
+
+
+def plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Stages of a plan tree, outermost first, without filters or index bounds
+    (they carry the query's values)"""
+    stages = []
+    if "queryPlan" in plan:
+        # Slot-based execution engine (MongoDB 5.1+)
+        plan = plan["queryPlan"]
+    nodes = [plan]
+    while nodes:
+        node = nodes.pop(0)
+        stage = {"stage": node.get("stage")}
+        if node.get("indexName"):
+            stage["indexName"] = node["indexName"]
+        stages.append(stage)
+        if isinstance(node.get("inputStage"), dict):
+            nodes.append(node["inputStage"])
+        nodes.extend(child for child in node.get("inputStages", []) if isinstance(child, dict))
+    return stages
+
+
+class SlowCommandMonitor(monitoring.CommandListener):
+    """Logs MongoDB commands slower than SLOW_COMMAND_MS (default 100, "off"
+    disables) to the capped slow_commands collection.
+
+    Each entry has the route that issued the command, its value-free shape,
+    and the stages of the winning plan from a queryPlanner explain(), with
+    COLLSCANs flagged. Listener callbacks run on driver threads, so the slow
+    ones are handed to the event loop, where the explain and the insert run
+    without holding up the request (SLOW_COMMAND_EXPLAIN=false skips explain).
+    """
+
+    def __init__(self, threshold_ms: Optional[float] = None, explain: Optional[bool] = None):
+        # Explicit settings; the rest are read from the environment by start()
+        self._threshold_override = threshold_ms
+        self._explain_override = explain
+        self.threshold_ms: Optional[float] = None
+        self.explain = False
+        self.log_bytes = 16 * 1024 * 1024
+        self.recorded = 0
+        self.collscans = 0
+        self.dropped = 0
+        self._started: Dict[Tuple[Any, int], Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]] = {}
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+        self._collection_ready = False
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Start writing slow commands of this worker (app startup)"""
+        self.threshold_ms = self._threshold_override if self._threshold_override is not None else _threshold_ms()
+        self.explain = (
+            self._explain_override if self._explain_override is not None
+            else os.environ.get('SLOW_COMMAND_EXPLAIN', 'true').lower() != 'false'
+        )
+        self.log_bytes = int(float(os.environ.get('SLOW_COMMAND_LOG_MB', '16')) * 1024 * 1024)
+        self._db = db
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        """Cancel pending explains (app shutdown)"""
+        self._db = None
+        self._loop = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "thresholdMs": self.threshold_ms,
+            "explain": self.explain,
+            "recorded": self.recorded,
+            "collscans": self.collscans,
+            "dropped": self.dropped,
+        }
+
+    def started(self, event):
+        if self.threshold_ms is None or self._loop is None or event.command_name not in MONITORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str) or collection == SLOW_COMMAND_COLLECTION:
+            return
+        # Motor runs the driver in an executor with the request's context copied
+        self._started[(event.connection_id, event.request_id)] = (collection, event.command, request_scope.get())
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed: bool):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None or event.duration_micros < self.threshold_ms * 1000:
+            return
+        collection, command, scope = started
+        SLOW_COMMANDS.inc((collection, event.command_name))
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(
+                self._spawn, event.command_name, collection, command, scope, event.duration_micros / 1000, failed
+            )
+        except RuntimeError:
+            # Loop closed during shutdown
+            pass
+
+    def _spawn(self, command_name: str, collection: str, command: Dict[str, Any],
+               scope: Optional[Dict[str, Any]], duration_ms: float, failed: bool):
+        if self._db is None:
+            return
+        if len(self._tasks) >= MAX_PENDING:
+            self.dropped += 1
+            return
+        entry = {
+            "at": datetime.now(timezone.utc),
+            "method": scope["method"] if scope else None,
+            "route": route_template(scope) if scope else None,
+            "collection": collection,
+            "command": command_name,
+            "shape": command_shape(command_name, command),
+            "durationMs": round(duration_ms, 2),
+            "failed": failed,
+        }
+        task = asyncio.create_task(self._record(self._db, entry, command))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _record(self, db: AsyncIOMotorDatabase, entry: Dict[str, Any], command: Dict[str, Any]):
+        try:
+            if self.explain:
+                await self._explain(db, entry, command)
+            await self._ensure_collection(db)
+            await db[SLOW_COMMAND_COLLECTION].insert_one(entry)
+            self.recorded += 1
+            if entry.get("collscan"):
+                self.collscans += 1
+            logger.warning(
+                f"Slow {entry['command']} on {entry['collection']} ({entry['durationMs']}ms) "
+                f"from {entry['method']} {entry['route']}: {entry['shape']}"
+                + (" [COLLSCAN]" if entry.get("collscan") else "")
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error recording slow command: {str(e)}")
+
+    async def _explain(self, db: AsyncIOMotorDatabase, entry: Dict[str, Any], command: Dict[str, Any]):
+        try:
+            result = await db.command(
+                {"explain": explain_command(entry["command"], command), "verbosity": "queryPlanner"}
+            )
+        except (PyMongoError, NotImplementedError) as e:
+            entry["explainError"] = str(e)
+            return
+        plans = [plan_stages(plan) for plan in _winning_plans(result) if isinstance(plan, dict)]
+        entry["plan"] = plans[0] if len(plans) == 1 else plans
+        entry["collscan"] = any(stage["stage"] == "COLLSCAN" for plan in plans for stage in plan)
+
+    async def _ensure_collection(self, db: AsyncIOMotorDatabase):
+        """Create the capped collection before the first insert would create a plain one"""
+        if self._collection_ready:
+            return
+        try:
+            await db.create_collection(SLOW_COMMAND_COLLECTION, capped=True, size=self.log_bytes)
+        except CollectionInvalid:
+            # Exists already (another worker, an earlier run)
+            pass
+        self._collection_ready = True
+
+
+# Registered on the Motor client of this process by Database.connect()
+slow_command_monitor = SlowCommandMonitor()
+
+
+async def recent_slow_commands(db: AsyncIOMotorDatabase, limit: int = 50, collection: Optional[str] = None,
+                               route: Optional[str] = None, collscan: Optional[bool] = None,
+                               min_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Newest entries of the slow command log first"""
+    query: Dict[str, Any] = {}
+    if collection:
+        query["collection"] = collection
+    if route:
+        query["route"] = route
+    if collscan is not None:
+        query["collscan"] = True if collscan else {"$ne": True}
+    if min_ms is not None:
+        query["durationMs"] = {"$gte": min_ms}
+    cursor = db[SLOW_COMMAND_COLLECTION].find(query, {"_id": 0}).sort("$natural", -1).limit(limit)
+    return await cursor.to_list(length=limit)
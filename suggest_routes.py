@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from typeahead import suggest_index, TYPE_PRIORITY
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/suggest", tags=["suggest"])
+
+@router.get("")
+async def suggest(
+    q: str = Query(..., min_length=1, description="Partial search text"),
+    types: Optional[str] = Query(None, description="Comma-separated suggestion types to include"),
+    limit: int = Query(10, ge=1, le=25)
+):
+    """Typeahead suggestions over provider/broker names, signal types, instruments and regulators"""
+    try:
+        type_filter = None
+        if types:
+            type_filter = {t.strip() for t in types.split(",") if t.strip()}
+            unknown = type_filter - set(TYPE_PRIORITY)
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown suggestion types: {', '.join(sorted(unknown))}"
+                )
+        
+        return {
+            "success": True,
+            "data": suggest_index.suggest(q, limit, type_filter)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get suggestions")
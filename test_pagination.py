@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import apply_cursor, decode_cursor, encode_cursor, fetch_page, next_cursor, sort_spec
+
+# Optional sort field: some documents hold null, some lack it entirely
+DOCS = [
+    {"id": "a", "rating": 4.5},
+    {"id": "b", "rating": None},
+    {"id": "c", "rating": 3},
+    {"id": "d"},
+    {"id": "e", "rating": 4.5},
+    {"id": "f", "rating": None},
+    {"id": "g", "rating": 1.0},
+]
+
+
+async def _walk(sort: str, limit: int):
+    collection = AsyncMongoMockClient()["test"]["providers"]
+    await collection.insert_many([dict(doc) for doc in DOCS])
+    direction = -1 if sort.startswith("-") else 1
+    field = sort.lstrip("-")
+
+    seen, cursor = [], None
+    while True:
+        page_query = apply_cursor({}, cursor, sort, field, direction)
+        docs, _ = await fetch_page(collection, {}, page_query, sort_spec(field, direction), 0, limit, "none")
+        seen.extend(doc["id"] for doc in docs)
+        cursor = next_cursor(docs, limit, sort, field)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_ascending_pages_cross_from_nulls_to_values(limit):
+    assert asyncio.run(_walk("rating", limit)) == ["b", "d", "f", "g", "c", "a", "e"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_descending_pages_cross_from_values_to_nulls(limit):
+    assert asyncio.run(_walk("-rating", limit)) == ["e", "a", "c", "g", "f", "d", "b"]
+
+
+def test_cursor_rejects_operators():
+    cursor = encode_cursor("rating", {"id": "a", "rating": {"$ne": None}}, "rating")
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "rating")
+    assert error.value.status_code == 400
@@ -0,0 +1,24 @@
+from typeahead import PrefixTrie, SuggestIndex
+
+
+def test_trie_terms_may_contain_dollar_signs():
+    trie = PrefixTrie()
+    trie.add("us", ("instrument", "us"))
+    trie.add("us$x", ("instrument", "us$x"))
+    trie.add("$100", ("provider", "1"))
+
+    assert trie.complete("us", 10) == {("instrument", "us"), ("instrument", "us$x")}
+    assert trie.complete("$", 10) == {("provider", "1")}
+    assert trie.complete("", 10) == {("instrument", "us"), ("instrument", "us$x"), ("provider", "1")}
+
+    trie.discard("us$x", ("instrument", "us$x"))
+    assert trie.complete("us", 10) == {("instrument", "us")}
+
+
+def test_suggest_label_with_dollar_sign():
+    index = SuggestIndex()
+    index.upsert("providers", {"id": "1", "name": "$100 Club", "signalTypes": ["US$ Forex"]})
+    index.upsert("providers", {"id": "2", "name": "US Signals", "signalTypes": []})
+
+    assert [result["label"] for result in index.suggest("$1")] == ["$100 Club"]
+    assert {result["label"] for result in index.suggest("us")} == {"US Signals", "US$ Forex"}
@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from typing import List, Optional
 from models import Testimonial, TestimonialCreate, TestimonialUpdate, TestimonialListResponse, TestimonialResponse
-from database import database
+from dependencies import get_db, get_auth
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from auth import EmergentAuth
+from cache import get_cache, cached
+from versioning import bump_version
+from export import export_response
+from responses import model_response
+from timing import timed
+from pagination import parse_sort, sort_spec, apply_cursor, next_cursor, fetch_page
+from pymongo import ReturnDocument
 from datetime import datetime, timezone
 import uuid
 import logging
@@ -11,17 +19,27 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/testimonials", tags=["testimonials"])
 
-# Initialize auth instance  
-auth = EmergentAuth(database.db)
+# Response cache for the read routes, cleared by every write below
+testimonial_cache = get_cache("testimonials")
+
+# Fields accepted by ?sort= (each backed by an (approved, field, id) index)
+SORT_FIELDS = ["createdAt", "rating"]
 
 @router.get("/", response_model=TestimonialListResponse)
+@cached(testimonial_cache)
 async def get_testimonials(
     approved: Optional[bool] = Query(True, description="Filter by approval status"),
+    sort: str = Query("createdAt", description="Sort field, prefix with - for descending"),
+    cursor: Optional[str] = Query(None, description="Opaque nextCursor from the previous page (replaces skip)"),
+    total: str = Query("exact", pattern="^(exact|estimated|none)$", description="Total count mode: exact, estimated or none"),
     limit: int = Query(50, ge=1, le=100),
-    skip: int = Query(0, ge=0)
+    skip: int = Query(0, ge=0),
+    db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get all testimonials with optional filters"""
     try:
+        sort_field, sort_direction = parse_sort(sort, SORT_FIELDS)
+        
         # Build filter query
         filter_query = {}
         
@@ -29,40 +47,76 @@ async def get_testimonials(
         if approved is not None:
             filter_query["approved"] = approved
         
-        # Get total count
-        total = await database.db.testimonials.count_documents(filter_query)
-        
-        # Get testimonials with pagination
-        cursor = database.db.testimonials.find(filter_query).skip(skip).limit(limit)
-        testimonials_data = await cursor.to_list(length=limit)
+        # Get testimonials page and total concurrently, with keyset pagination
+        # (or legacy skip when no cursor)
+        page_query = apply_cursor(filter_query, cursor, sort, sort_field, sort_direction)
+        testimonials_data, total_count = await fetch_page(
+            db.testimonials,
+            filter_query,
+            page_query,
+            sort_spec(sort_field, sort_direction),
+            0 if cursor else skip,
+            limit,
+            total
+        )
         
-        testimonials = [Testimonial(**testimonial_data) for testimonial_data in testimonials_data]
+        with timed("model"):
+            testimonials = [Testimonial(**testimonial_data) for testimonial_data in testimonials_data]
         
-        return TestimonialListResponse(
+        return model_response(TestimonialListResponse(
             success=True,
             data=testimonials,
-            total=total
-        )
+            total=total_count,
+            nextCursor=next_cursor(testimonials_data, limit, sort, sort_field)
+        ))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting testimonials: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get testimonials")
 
+@router.get("/export")
+async def export_testimonials(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    batchSize: int = Query(1000, ge=1, le=10000, description="Documents fetched per cursor batch"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
+):
+    """Stream every testimonial as NDJSON or CSV (Admin only)"""
+    try:
+        # Require admin authentication
+        await auth.require_admin(request)
+        
+        return export_response(db.testimonials, Testimonial, format, batchSize)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting testimonials: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export testimonials")
+
 @router.get("/{testimonial_id}", response_model=TestimonialResponse)
-async def get_testimonial(testimonial_id: str):
+@cached(testimonial_cache)
+async def get_testimonial(
+    testimonial_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Get single testimonial by ID"""
     try:
-        testimonial_data = await database.db.testimonials.find_one({"id": testimonial_id})
+        testimonial_data = await db.testimonials.find_one({"id": testimonial_id})
         
         if not testimonial_data:
             raise HTTPException(status_code=404, detail="Testimonial not found")
         
-        testimonial = Testimonial(**testimonial_data)
+        with timed("model"):
+            testimonial = Testimonial(**testimonial_data)
         
-        return TestimonialResponse(
+        return model_response(TestimonialResponse(
             success=True,
             data=testimonial
-        )
+        ))
         
     except HTTPException:
         raise
@@ -73,7 +127,9 @@ async def get_testimonial(testimonial_id: str):
 @router.post("/", response_model=TestimonialResponse)
 async def create_testimonial(
     testimonial_data: TestimonialCreate,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Create new testimonial (Admin only)"""
     try:
@@ -88,13 +144,15 @@ async def create_testimonial(
         )
         
         # Insert into database
-        await database.db.testimonials.insert_one(new_testimonial.dict())
+        await db.testimonials.insert_one(new_testimonial.dict())
+        testimonial_cache.clear()
+        await bump_version(db, "testimonials")
         
-        return TestimonialResponse(
+        return model_response(TestimonialResponse(
             success=True,
             data=new_testimonial,
             message="Testimonial created successfully"
-        )
+        ))
         
     except HTTPException:
         raise
@@ -106,36 +164,42 @@ async def create_testimonial(
 async def update_testimonial(
     testimonial_id: str,
     testimonial_update: TestimonialUpdate,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Update testimonial (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if testimonial exists
-        existing_testimonial = await database.db.testimonials.find_one({"id": testimonial_id})
-        if not existing_testimonial:
-            raise HTTPException(status_code=404, detail="Testimonial not found")
-        
         # Prepare update data
         update_data = testimonial_update.dict(exclude_unset=True)
-        if update_data:            
-            # Update testimonial
-            await database.db.testimonials.update_one(
+        if update_data:
+            # Update and read back in one operation
+            updated_testimonial_data = await db.testimonials.find_one_and_update(
                 {"id": testimonial_id},
-                {"$set": update_data}
+                {"$set": update_data},
+                return_document=ReturnDocument.AFTER
             )
+        else:
+            updated_testimonial_data = await db.testimonials.find_one({"id": testimonial_id})
+        
+        if not updated_testimonial_data:
+            raise HTTPException(status_code=404, detail="Testimonial not found")
         
-        # Get updated testimonial
-        updated_testimonial_data = await database.db.testimonials.find_one({"id": testimonial_id})
-        updated_testimonial = Testimonial(**updated_testimonial_data)
+        if update_data:
+            testimonial_cache.clear()
+            await bump_version(db, "testimonials")
         
-        return TestimonialResponse(
+        with timed("model"):
+            updated_testimonial = Testimonial(**updated_testimonial_data)
+        
+        return model_response(TestimonialResponse(
             success=True,
             data=updated_testimonial,
             message="Testimonial updated successfully"
-        )
+        ))
         
     except HTTPException:
         raise
@@ -146,20 +210,21 @@ async def update_testimonial(
 @router.delete("/{testimonial_id}")
 async def delete_testimonial(
     testimonial_id: str,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Delete testimonial (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if testimonial exists
-        existing_testimonial = await database.db.testimonials.find_one({"id": testimonial_id})
-        if not existing_testimonial:
-            raise HTTPException(status_code=404, detail="Testimonial not found")
-        
         # Delete testimonial
-        await database.db.testimonials.delete_one({"id": testimonial_id})
+        result = await db.testimonials.delete_one({"id": testimonial_id})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Testimonial not found")
+        testimonial_cache.clear()
+        await bump_version(db, "testimonials")
         
         return {
             "success": True,
@@ -176,23 +241,24 @@ async def delete_testimonial(
 async def approve_testimonial(
     testimonial_id: str,
     approved: bool,
-    request: Request
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    auth: EmergentAuth = Depends(get_auth)
 ):
     """Approve or reject testimonial (Admin only)"""
     try:
         # Require admin authentication
         await auth.require_admin(request)
         
-        # Check if testimonial exists
-        existing_testimonial = await database.db.testimonials.find_one({"id": testimonial_id})
-        if not existing_testimonial:
-            raise HTTPException(status_code=404, detail="Testimonial not found")
-        
         # Update approval status
-        await database.db.testimonials.update_one(
+        result = await db.testimonials.update_one(
             {"id": testimonial_id},
             {"$set": {"approved": approved}}
         )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Testimonial not found")
+        testimonial_cache.clear()
+        await bump_version(db, "testimonials")
         
         status_text = "approved" if approved else "rejected"
         
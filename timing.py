@@ -0,0 +1,202 @@
+from contextvars import ContextVar
+from pymongo import monitoring
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import time
+
+DEBUG_HEADER = b"x-debug-timing"
+
+# Server-Timing metric names and the desc shown by browser devtools
+DESCRIPTIONS = {
+    "auth": "Auth lookup",
+    "upstream": "Emergent session API",
+    "db": "MongoDB",
+    "model": "Pydantic models",
+    "serialize": "Serialization",
+    "cache": "Response cache",
+}
+
+
+class ServerTiming:
+    """Time spent per phase while serving one request.
+
+    Spans are appended from the event loop and, for Mongo commands, from
+    Motor's executor threads; list.append is atomic, so no lock is needed.
+    Spans of one name are summed, so concurrent queries (a page and its
+    count) add up to more than their wall time.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+        self.notes: Dict[str, str] = {}
+
+    def add(self, name: str, seconds: float):
+        self.spans.append((name, seconds))
+
+    def note(self, name: str, desc: str):
+        """A metric without a duration, e.g. cache;desc="hit" """
+        self.notes[name] = desc
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        totals: Dict[str, Dict[str, Any]] = {}
+        for name, seconds in list(self.spans):
+            total = totals.setdefault(name, {"ms": 0.0, "count": 0})
+            total["ms"] += seconds * 1000
+            total["count"] += 1
+        for total in totals.values():
+            total["ms"] = round(total["ms"], 2)
+        return totals
+
+    def header(self) -> str:
+        metrics = [
+            f'{name};dur={total["ms"]};desc="{DESCRIPTIONS.get(name, name)}"'
+            for name, total in self.totals().items()
+        ]
+        metrics.extend(f'{name};desc="{desc}"' for name, desc in self.notes.items())
+        metrics.append(f"total;dur={round((time.perf_counter() - self.start) * 1000, 2)}")
+        return ", ".join(metrics)
+
+    def debug(self) -> Dict[str, Any]:
+        return {
+            "totalMs": round((time.perf_counter() - self.start) * 1000, 2),
+            "spans": self.totals(),
+            "notes": dict(self.notes),
+        }
+
+
+# Timing of the request being served (None outside requests or when disabled)
+request_timing: ContextVar[Optional[ServerTiming]] = ContextVar("request_timing", default=None)
+
+
+class _Span:
+    __slots__ = ("name", "timing", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timing = request_timing.get()
+        if self.timing is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timing is not None:
+            self.timing.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timed(name: str) -> _Span:
+    """Context manager adding the enclosed block to the request's Server-Timing
+    under ``name`` (a no-op outside requests)"""
+    return _Span(name)
+
+
+def note(name: str, desc: str):
+    """Attach a duration-less metric (e.g. a cache hit) to the request's Server-Timing"""
+    timing = request_timing.get()
+    if timing is not None:
+        timing.note(name, desc)
+
+
+class MongoTiming(monitoring.CommandListener):
+    """Adds every command's server round trip to the request's "db" span.
+
+    Motor runs the driver in an executor with the request's context copied,
+    so the request's ServerTiming is visible from the listener threads.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        timing = request_timing.get()
+        if timing is not None:
+            timing.add("db", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+# Registered on the Motor client of this process by Database.connect()
+mongo_timing = MongoTiming()
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware emitting the Server-Timing header of every response.
+
+    SERVER_TIMING=false drops the header (it reveals backend timings to
+    clients). With SERVER_TIMING_DEBUG=true, JSON object responses of requests
+    sending "X-Debug-Timing: 1" are buffered and get the breakdown added to
+    the body, under "serverTiming".
+    """
+
+    def __init__(self, app, enabled: Optional[bool] = None, debug: Optional[bool] = None):
+        self.app = app
+        self.enabled = enabled if enabled is not None else os.environ.get('SERVER_TIMING', 'true').lower() != 'false'
+        self.debug = debug if debug is not None else os.environ.get('SERVER_TIMING_DEBUG', 'false').lower() == 'true'
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timing = ServerTiming()
+        debug = self.debug and dict(scope["headers"]).get(DEBUG_HEADER) == b"1"
+        held = {}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                if debug and _is_json(message):
+                    held["start"] = message
+                    held["body"] = []
+                    return
+                message["headers"] = list(message.get("headers", [])) + _timing_headers(timing)
+            elif "start" in held and message["type"] == "http.response.body":
+                held["body"].append(message.get("body", b""))
+                if message.get("more_body"):
+                    return
+                message = await _send_debug(held, timing, send)
+            await send(message)
+
+        token = request_timing.set(timing)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timing.reset(token)
+
+
+def _is_json(message) -> bool:
+    return any(
+        key.lower() == b"content-type" and value.startswith(b"application/json")
+        for key, value in message.get("headers", [])
+    )
+
+
+def _timing_headers(timing: ServerTiming) -> List[Tuple[bytes, bytes]]:
+    return [
+        (b"server-timing", timing.header().encode("latin-1")),
+        # Let the cross-origin frontend read the entries (PerformanceResourceTiming)
+        (b"timing-allow-origin", b"*"),
+    ]
+
+
+async def _send_debug(held, timing: ServerTiming, send):
+    """Send the held response start with the breakdown merged into the body;
+    returns the final body message"""
+    body = b"".join(held["body"])
+    try:
+        content = json.loads(body)
+        if isinstance(content, dict):
+            content["serverTiming"] = timing.debug()
+            body = json.dumps(content, default=str).encode("utf-8")
+    except ValueError:
+        pass
+    start = held.pop("start")
+    start["headers"] = [
+        (key, value) for key, value in start.get("headers", []) if key.lower() != b"content-length"
+    ] + [(b"content-length", str(len(body)).encode("latin-1"))] + _timing_headers(timing)
+    await send(start)
+    return {"type": "http.response.body", "body": body, "more_body": False}
@@ -0,0 +1,346 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Which document fields feed the index, per collection: (suggestion type, field, is_name)
+INDEXED_FIELDS = {
+    "providers": [("provider", "name", True), ("signalType", "signalTypes", False)],
+    "brokers": [("broker", "name", True), ("instrument", "instruments", False), ("regulator", "regulation", False)],
+}
+
+# catch_up() re-reads this far behind the newest updatedAt it has seen, for
+# writes committed after it read (or stamped by a clock running behind)
+CATCH_UP_OVERLAP = timedelta(seconds=5)
+
+# Names rank above tags when scores tie
+TYPE_PRIORITY = {"provider": 0, "broker": 0, "signalType": 1, "instrument": 1, "regulator": 2}
+
+EntryKey = Tuple[str, str]
+
+
+def normalize(text: str) -> str:
+    """Lower-case and strip accents so "Médio" matches "medio" """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().strip()
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in normalize(text).split() if token]
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, giving up early once it exceeds ``max_distance``"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+# Terminal key of trie nodes; no character of a term can collide with it
+_END = object()
+
+
+class PrefixTrie:
+    """Maps normalized strings to entry keys, with prefix completion"""
+
+    def __init__(self):
+        self._root: Dict[Any, Any] = {}
+
+    def add(self, term: str, key: EntryKey):
+        node = self._root
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node.setdefault(_END, set()).add(key)
+
+    def discard(self, term: str, key: EntryKey):
+        node = self._root
+        for ch in term:
+            node = node.get(ch)
+            if node is None:
+                return
+        node.get(_END, set()).discard(key)
+
+    def complete(self, prefix: str, max_keys: int) -> Set[EntryKey]:
+        """Entry keys of terms starting with ``prefix`` (shortest terms first)"""
+        node = self._root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return set()
+
+        found: Set[EntryKey] = set()
+        level = [node]
+        while level and len(found) < max_keys:
+            next_level = []
+            for current in level:
+                for ch, child in current.items():
+                    if ch is _END:
+                        found.update(child)
+                    else:
+                        next_level.append(child)
+            level = next_level
+        return found
+
+
+def _deletes(token: str, max_distance: int) -> Set[str]:
+    """All strings reachable from ``token`` by up to ``max_distance`` deletions"""
+    results = {token}
+    frontier = {token}
+    for _ in range(max_distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        results |= frontier
+    return results
+
+
+class DeleteIndex:
+    """Symmetric-delete index over tokens for typo-tolerant lookups.
+
+    Every token is stored under each variant obtained by deleting up to
+    ``max_distance`` characters; a query only has to generate its own delete
+    variants and verify the few candidates that share one, so lookups cost
+    the same regardless of vocabulary size. Tokens are never removed; callers
+    filter out tokens that no longer map to any entry.
+    """
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        self._variants: Dict[str, Set[str]] = {}
+        self._tokens: Set[str] = set()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def add(self, token: str):
+        if token in self._tokens:
+            return
+        self._tokens.add(token)
+        for variant in _deletes(token, self.max_distance):
+            self._variants.setdefault(variant, set()).add(token)
+
+    def search(self, token: str, max_distance: int) -> List[Tuple[int, str]]:
+        max_distance = min(max_distance, self.max_distance)
+        candidates = set()
+        for variant in _deletes(token, max_distance):
+            candidates |= self._variants.get(variant, set())
+
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(token, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, candidate))
+        return sorted(matches)
+
+
+def _projection(collection: str) -> Dict[str, int]:
+    return {"_id": 1, "id": 1, "updatedAt": 1, **{field: 1 for _, field, _ in INDEXED_FIELDS[collection]}}
+
+
+class SuggestIndex:
+    """In-memory typeahead over catalog names and tags.
+
+    Entries are either a provider/broker name (keyed by document id) or a tag
+    such as a signal type, instrument or regulator (keyed by its normalized
+    value and reference counted by the documents that carry it).
+    """
+
+    def __init__(self):
+        self._trie = PrefixTrie()
+        self._fuzzy = DeleteIndex()
+        self._labels: Dict[EntryKey, str] = {}
+        self._refs: Dict[EntryKey, Set[str]] = {}
+        self._token_keys: Dict[str, Set[EntryKey]] = {}
+        self._documents: Dict[Tuple[str, str], List[EntryKey]] = {}
+        # (collection, str(_id)) -> id, so change stream deletes (which only
+        # carry the _id) can be applied
+        self._object_ids: Dict[Tuple[str, str], str] = {}
+        # Newest updatedAt read from each collection, for catch_up()
+        self._updated_at: Dict[str, datetime] = {}
+        self.ready = False
+
+    def _add_entry(self, key: EntryKey, label: str, ref: str):
+        refs = self._refs.setdefault(key, set())
+        if not refs:
+            self._labels[key] = label
+            self._trie.add(normalize(label), key)
+            for token in tokenize(label):
+                self._trie.add(token, key)
+                self._token_keys.setdefault(token, set()).add(key)
+                self._fuzzy.add(token)
+        refs.add(ref)
+
+    def _remove_entry(self, key: EntryKey, ref: str):
+        refs = self._refs.get(key)
+        if refs is None:
+            return
+        refs.discard(ref)
+        if refs:
+            return
+        label = self._labels.pop(key)
+        del self._refs[key]
+        self._trie.discard(normalize(label), key)
+        for token in tokenize(label):
+            self._trie.discard(token, key)
+            self._token_keys.get(token, set()).discard(key)
+
+    def upsert(self, collection: str, doc: Dict[str, Any]):
+        """Index (or re-index) one provider/broker document"""
+        if collection not in INDEXED_FIELDS:
+            return
+        self.remove(collection, doc["id"])
+        if "_id" in doc:
+            self._object_ids[(collection, str(doc["_id"]))] = doc["id"]
+
+        ref = f"{collection}:{doc['id']}"
+        keys = []
+        for kind, field, is_name in INDEXED_FIELDS[collection]:
+            value = doc.get(field)
+            if not value:
+                continue
+            values = [value] if is_name else value
+            for label in values:
+                key = (kind, doc["id"]) if is_name else (kind, normalize(label))
+                self._add_entry(key, label, ref)
+                keys.append(key)
+        self._documents[(collection, doc["id"])] = keys
+
+    def remove(self, collection: str, doc_id: str):
+        """Drop one document's contributions from the index"""
+        keys = self._documents.pop((collection, doc_id), None)
+        if not keys:
+            return
+        ref = f"{collection}:{doc_id}"
+        for key in keys:
+            self._remove_entry(key, ref)
+
+    def remove_by_object_id(self, collection: str, object_id: Any) -> bool:
+        """Drop a document known only by its _id; False if it was never seen"""
+        doc_id = self._object_ids.pop((collection, str(object_id)), None)
+        if doc_id is None:
+            return False
+        self.remove(collection, doc_id)
+        return True
+
+    def _saw_update(self, collection: str, doc: Dict[str, Any]):
+        updated_at = doc.get("updatedAt")
+        if isinstance(updated_at, datetime):
+            # Mongo hands back naive UTC datetimes
+            updated_at = updated_at.replace(tzinfo=None)
+            if updated_at > self._updated_at.get(collection, datetime.min):
+                self._updated_at[collection] = updated_at
+
+    async def load(self, db: AsyncIOMotorDatabase, batch_size: int = 1000):
+        """Build the index from scratch by streaming the catalog collections"""
+        self.__init__()
+        for collection, fields in INDEXED_FIELDS.items():
+            projection = _projection(collection)
+            async for doc in db[collection].find({}, projection).batch_size(batch_size):
+                self.upsert(collection, doc)
+                self._saw_update(collection, doc)
+        self.ready = True
+        logger.info(f"Suggest index built: {len(self._labels)} entries, {len(self._fuzzy)} tokens")
+
+    async def refresh(self, db: AsyncIOMotorDatabase, collection: str, ids: List[str]):
+        """Re-read a set of documents (e.g. after a bulk write) and re-index them"""
+        if collection not in INDEXED_FIELDS:
+            return
+        projection = _projection(collection)
+        found = set()
+        async for doc in db[collection].find({"id": {"$in": ids}}, projection):
+            self.upsert(collection, doc)
+            found.add(doc["id"])
+        for doc_id in set(ids) - found:
+            self.remove(collection, doc_id)
+
+    async def resync(self, db: AsyncIOMotorDatabase, collection: str, batch_size: int = 1000):
+        """Re-read a whole collection when the changed ids are unknown (e.g. a
+        delete seen by another worker), without emptying the index meanwhile"""
+        if collection not in INDEXED_FIELDS:
+            return
+        projection = _projection(collection)
+        stale = {doc_id for name, doc_id in self._documents if name == collection}
+        async for doc in db[collection].find({}, projection).batch_size(batch_size):
+            self.upsert(collection, doc)
+            self._saw_update(collection, doc)
+            stale.discard(doc["id"])
+        for doc_id in stale:
+            self.remove(collection, doc_id)
+
+    async def catch_up(self, db: AsyncIOMotorDatabase, collection: str):
+        """Re-index the documents updated since the newest one read, when
+        another process wrote but the changed ids are unknown.
+
+        Deletes leave no updatedAt behind; they show up as more documents
+        indexed than the collection holds, and only then is it resynced.
+        """
+        if collection not in INDEXED_FIELDS:
+            return
+        since = self._updated_at.get(collection)
+        if since is None:
+            await self.resync(db, collection)
+            return
+        query = {"updatedAt": {"$gte": since - CATCH_UP_OVERLAP}}
+        async for doc in db[collection].find(query, _projection(collection)):
+            self.upsert(collection, doc)
+            self._saw_update(collection, doc)
+        indexed = sum(1 for name, _ in self._documents if name == collection)
+        if indexed > await db[collection].estimated_document_count():
+            await self.resync(db, collection)
+
+    def _to_result(self, key: EntryKey) -> Dict[str, Any]:
+        kind, value = key
+        result = {"type": kind, "label": self._labels[key]}
+        if kind in ("provider", "broker"):
+            result["id"] = value
+        else:
+            result["count"] = len(self._refs[key])
+        return result
+
+    def _rank(self, keys: Iterable[EntryKey]) -> List[EntryKey]:
+        return sorted(
+            keys,
+            key=lambda key: (TYPE_PRIORITY.get(key[0], 9), -len(self._refs[key]), self._labels[key])
+        )
+
+    def suggest(self, q: str, limit: int = 10, types: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Prefix matches first, then typo-tolerant matches on the last word"""
+        query = normalize(q)
+        if not query:
+            return []
+
+        def allowed(key: EntryKey) -> bool:
+            return key in self._labels and (not types or key[0] in types)
+
+        prefix_keys = [key for key in self._trie.complete(query, limit * 4) if allowed(key)]
+        results = self._rank(prefix_keys)[:limit]
+
+        if len(results) < limit:
+            token = tokenize(q)[-1]
+            max_distance = 1 if len(token) <= 4 else 2
+            seen = set(results)
+            fuzzy = []
+            for distance, word in self._fuzzy.search(token, max_distance):
+                matches = [key for key in self._token_keys.get(word, ()) if allowed(key) and key not in seen]
+                fuzzy.extend(self._rank(matches))
+                seen.update(matches)
+            results += fuzzy[:limit - len(results)]
+
+        return [self._to_result(key) for key in results]
+
+
+# Global suggest index instance
+suggest_index = SuggestIndex()
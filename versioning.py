@@ -0,0 +1,140 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One document per catalog collection: {_id: name, version: int, lastModified: datetime}
+VERSION_COLLECTION = "collection_versions"
+
+# GET routes under these prefixes get ETag / Last-Modified / 304 handling
+VERSIONED_PREFIXES = {
+    "/api/providers": "providers",
+    "/api/brokers": "brokers",
+    "/api/testimonials": "testimonials",
+}
+
+# (version, lastModified) per collection as this process knows it: filled by
+# load_versions() at startup, then kept current by bump_version() for local
+# writes and by the cache invalidator for writes made elsewhere. Requests
+# only read it, so conditional GETs never wait on Mongo.
+_versions: Dict[str, Tuple[int, datetime]] = {}
+
+
+def record_version(name: str, version: int, last_modified: datetime):
+    """Remember ``name``'s version document (never moving backwards)"""
+    known = _versions.get(name)
+    if known is not None and known[0] >= version:
+        return
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    _versions[name] = (version, last_modified.replace(microsecond=0))
+
+
+def current_version(name: str) -> Optional[Tuple[int, datetime]]:
+    """(version, lastModified) of ``name``, or None before load_versions()"""
+    return _versions.get(name)
+
+
+async def load_versions(db: AsyncIOMotorDatabase):
+    """Read (creating missing ones) the version documents of the catalog (startup)"""
+    for name in VERSIONED_PREFIXES.values():
+        doc = await db[VERSION_COLLECTION].find_one_and_update(
+            {"_id": name},
+            {"$setOnInsert": {"version": 1, "lastModified": datetime.now(timezone.utc)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        record_version(name, doc["version"], doc["lastModified"])
+
+
+async def bump_version(db: AsyncIOMotorDatabase, name: str) -> Optional[int]:
+    """Record a write to ``name`` (called by the write handlers after it succeeded).
+
+    A failure is logged rather than raised: the write itself went through, and
+    other workers still drop their caches within their TTL.
+    """
+    try:
+        doc = await db[VERSION_COLLECTION].find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$set": {"lastModified": datetime.now(timezone.utc)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        logger.error(f"Error bumping {name} version: {str(e)}")
+        return None
+    record_version(name, doc["version"], doc["lastModified"])
+    return doc["version"]
+
+
+def make_etag(version: int, path: str, query: bytes) -> str:
+    """Strong ETag for one collection version and one exact URL"""
+    url_hash = hashlib.sha1(path.encode() + b"?" + query).hexdigest()[:16]
+    return f'"v{version}-{url_hash}"'
+
+
+def _not_modified(headers: Dict[bytes, bytes], etag: str, last_modified: datetime) -> bool:
+    if_none_match = headers.get(b"if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since
+        if_none_match = if_none_match.decode("latin-1")
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    if_modified_since = headers.get(b"if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since.decode("latin-1"))
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _collection_for(path: str) -> Optional[str]:
+    if path.endswith("/export"):
+        return None
+    for prefix, name in VERSIONED_PREFIXES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return name
+    return None
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware adding ETag/Last-Modified to catalog GETs and answering
+    304 Not Modified from the in-process collection versions alone"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        name = None
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            name = _collection_for(scope["path"])
+        known = current_version(name) if name is not None else None
+        if known is None:
+            await self.app(scope, receive, send)
+            return
+
+        version, last_modified = known
+        etag = make_etag(version, scope["path"], scope["query_string"])
+        headers: List[Tuple[bytes, bytes]] = [
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", format_datetime(last_modified, usegmt=True).encode("latin-1")),
+            (b"cache-control", b"no-cache"),
+        ]
+
+        if _not_modified(dict(scope["headers"]), etag, last_modified):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)